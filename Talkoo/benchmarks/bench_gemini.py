@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# src 모듈을 그대로 사용
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import config
+from gemini_stub import start_stub
+from translator.gemini_integration import refine_with_gemini
+
+# Gemini 다듬기 단계를 로컬 대체 서버에 대고 측정 (네트워크/API 키 불필요)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemini 다듬기 단계 오프라인 벤치마크")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=16, help="동시에 호출하는 요청 스레드 수")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=config.gemini_concurrency)
+    args = parser.parse_args()
+
+    server, state = start_stub(latency=args.latency, failure_rate=args.failure_rate)
+    config.gemini_base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    config.gemini_api = config.gemini_api or "stub-key"
+    config.gemini_concurrency = args.concurrency
+    config.gemini_backoff = 0.05
+    # 같은 입력을 다시 돌려도 API 호출 시간을 재도록 결과 캐시는 끈다
+    config.gemini_cache = False
+
+    def call(index: int):
+        start = time.perf_counter()
+        reson, text = refine_with_gemini(f"original sentence {index}", f"번역 {index}", f"사전 번역 {index}")
+        return time.perf_counter() - start, text.startswith("[stub]")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        results = list(pool.map(call, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    succeeded = sum(1 for _, ok in results if ok)
+    print(f"requests      : {args.requests} (성공 {succeeded})")
+    print(f"stub requests : {state.requests} (재시도 포함), 최대 동시 {state.max_in_flight}")
+    print(f"elapsed       : {elapsed:.2f}s, {args.requests / elapsed:.1f} req/s")
+    print(f"latency p50   : {latencies[len(latencies) // 2] * 1000:.0f}ms, p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import argparse
+import functools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+# src 모듈을 그대로 사용
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import torch
+import transformers
+from tokenizers import Tokenizer, decoders, models, normalizers, pre_tokenizers
+from transformers import M2M100Config, M2M100ForConditionalGeneration, NllbTokenizerFast
+import config
+from customDICT.tkdic_paser import parse_tkdic
+from translator.first_translation import first_translation
+from translator.second_translation import tkdic_start, post_processing, second_translation
+from translation_manager import trans_start
+from utils import logger
+
+# 사전/번역 경로 전체를 CPU에서 오프라인으로 측정 (모델 다운로드 없음)
+# - 사전: 1k/10k/100k 항목 .tkdic 파일을 만들어 parse_tkdic, tkdic_start, post_processing 측정
+# - 모델: 직접 만든 tokenizer + 무작위 가중치의 작은 NLLB 구조(M2M100) 모델로 first/second_translation, trans_start 측정
+# 결과를 --json 으로 저장해 두고 다음 실행에서 --baseline 으로 비교한다
+#   python bench_pipeline.py --json baseline.json
+#   python bench_pipeline.py --baseline baseline.json --fail-on-regression
+
+BENCHMARKS = ("parse_tkdic", "tkdic_start", "post_processing", "first_translation", "second_translation", "trans_start")
+# 입력 길이: (문단 수, 문단당 문장 수), 문장은 12단어
+INPUT_SHAPES = {"short": (1, 1), "medium": (1, 6), "long": (4, 8)}
+SENTENCE_WORDS = 12
+TERM_RATE = 0.2  # 입력 단어 중 사전 용어 비율
+
+_FILLER = (
+    "the a an of and to in is was for on with as by at from this that it be are not or but have has had "
+    "we you they he she our your their will can should would could may must if then when while after "
+    "before because about into over under between through during without within new old first last "
+    "good high small large important different same next early simple public open system data model "
+    "user server request update release version support team project result change issue"
+).split()
+
+
+def _pseudo_word(index: int) -> str:
+    # 인덱스마다 정해진 가짜 단어. 글자를 고르게 뽑아야 실제 용어집처럼 3-gram이 적당히 흩어진다
+    rng = random.Random(index)
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+
+
+def _hangul(index: int) -> str:
+    return "".join(chr(0xAC00 + (index * 37 + offset * 101) % 11172) for offset in range(2 + index % 3))
+
+
+def _term(index: int) -> str:
+    # 다섯 개 중 하나는 두 단어 용어
+    if index % 5 == 4:
+        return f"{_pseudo_word(index)} {_pseudo_word(index * 7 + 3)}"
+    return _pseudo_word(index)
+
+
+def write_dictionary(path: str, size: int):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("main_fuzzy[80]\n")
+        for index in range(size):
+            f.write(f"\nword[{_term(index)}]\nkor[{_hangul(index)}]\nfuzzy[90]\n")
+
+
+def make_input(shape: str, terms: list[str], seed: int = 0) -> str:
+    # 같은 입력을 모든 사전 크기에 쓰므로 용어는 가장 작은 사전에 들어있는 것만 고른다
+    rng = random.Random(f"{shape}-{seed}")
+    paragraphs, sentences = INPUT_SHAPES[shape]
+    result = []
+    for _ in range(paragraphs):
+        lines = []
+        for _ in range(sentences):
+            words = [rng.choice(terms) if rng.random() < TERM_RATE else rng.choice(_FILLER) for _ in range(SENTENCE_WORDS)]
+            lines.append(" ".join(words).capitalize() + ".")
+        result.append(" ".join(lines))
+    return "\n\n".join(result)
+
+
+def build_model(work_dir: str, terms: list[str], d_model: int, layers: int):
+    # NllbTokenizerFast는 tokenizer.json만 있으면 언어 코드 특수 토큰/후처리를 스스로 붙인다
+    vocab = {"<s>": 0, "<pad>": 1, "</s>": 2, "<unk>": 3}
+    for word in _FILLER + [word for term in terms for word in term.split()] + [".", ","]:
+        vocab.setdefault(word, len(vocab))
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    backend.normalizer = normalizers.Lowercase()
+    backend.pre_tokenizer = pre_tokenizers.Sequence([pre_tokenizers.WhitespaceSplit(), pre_tokenizers.Punctuation()])
+    backend.decoder = decoders.WordPiece(prefix="##")
+    tokenizer_file = os.path.join(work_dir, "tokenizer.json")
+    backend.save(tokenizer_file)
+    tokenizer = NllbTokenizerFast(tokenizer_file=tokenizer_file, src_lang=config.src_lang, tgt_lang=config.tgt_lang)
+
+    torch.manual_seed(0)
+    model_config = M2M100Config(
+        vocab_size=len(tokenizer), d_model=d_model,
+        encoder_layers=layers, decoder_layers=layers,
+        encoder_attention_heads=4, decoder_attention_heads=4,
+        encoder_ffn_dim=d_model * 4, decoder_ffn_dim=d_model * 4,
+        max_position_embeddings=1024, scale_embedding=True,
+        pad_token_id=tokenizer.pad_token_id, bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id, decoder_start_token_id=tokenizer.eos_token_id,
+    )
+    model = M2M100ForConditionalGeneration(model_config).eval()
+    model.name_or_path = f"bench-nllb-d{d_model}-l{layers}"
+    return tokenizer, model
+
+
+def fix_output_length(model, new_tokens: int):
+    # 무작위 가중치는 </s>를 내지 않아 매번 512 토큰까지 생성하므로 출력 길이를 고정해 실행마다 같은 양을 디코딩한다
+    generate = model.generate
+
+    def fixed(*args, max_length=None, **kwargs):
+        return generate(*args, max_new_tokens=new_tokens, min_new_tokens=new_tokens, **kwargs)
+
+    model.generate = fixed
+
+
+def measure(func, repeats: int, min_seconds: float) -> dict:
+    # timeit autorange 방식: 한 번이 min_seconds보다 짧으면 묶어서 돌린 뒤 1회당 시간으로 환산
+    func()  # 워밍업 (사전 컴파일/로드, 첫 generate)
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds or loops >= 1 << 16:
+            break
+        loops *= 2
+    samples = [elapsed / loops]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return {
+        "ms": round(statistics.median(samples) * 1000, 4),
+        "ms_min": round(min(samples) * 1000, 4),
+        "ms_max": round(max(samples) * 1000, 4),
+        "loops": loops,
+        "repeats": len(samples),
+    }
+
+
+def _with_dictionary(func, tk_select: str, *args):
+    # trans_start는 설정의 사전 선택을 읽는다
+    config.tkdic_select = tk_select
+    return func(*args)
+
+
+def cases(tokenizer, model, inputs: dict, dictionaries: dict):
+    # (이름, 사전 크기, 입력 길이, 함수)
+    tk_path = config.tkdic_path
+    for size, name in dictionaries.items():
+        yield "parse_tkdic", size, None, functools.partial(parse_tkdic, os.path.join(tk_path, name))
+        for shape, text in inputs.items():
+            processed, placeholder_map = tkdic_start(text, tk_path, name)
+            yield "tkdic_start", size, shape, functools.partial(tkdic_start, text, tk_path, name)
+            yield "post_processing", size, shape, functools.partial(post_processing, processed, placeholder_map)
+            yield "second_translation", size, shape, functools.partial(second_translation, text, tk_path, name, tokenizer, model, "cpu")
+            yield "trans_start", size, shape, functools.partial(_with_dictionary, trans_start, name, text, tokenizer, model, "cpu")
+    for shape, text in inputs.items():
+        yield "first_translation", None, shape, functools.partial(first_translation, text, tokenizer, model, "cpu")
+
+
+def _key(row: dict) -> tuple:
+    return row["name"], row["dict_size"], row["input"]
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[dict]:
+    # 기준 결과와 같은 항목에 baseline_ms / change(비율)를 붙이고, threshold보다 느려진 항목을 돌려준다
+    reference = {_key(row): row for row in baseline.get("results", [])}
+    regressions = []
+    for row in results:
+        base = reference.get(_key(row))
+        if base is None or not base.get("ms"):
+            continue
+        row["baseline_ms"] = base["ms"]
+        row["change"] = round(row["ms"] / base["ms"] - 1, 3)
+        if row["change"] > threshold:
+            regressions.append(row)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="사전/번역 경로 오프라인 CPU 벤치마크")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="생성할 사전 항목 수")
+    parser.add_argument("--inputs", nargs="+", choices=list(INPUT_SHAPES), default=list(INPUT_SHAPES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="한 번의 측정에 쓸 최소 시간")
+    parser.add_argument("--model-dim", type=int, default=64)
+    parser.add_argument("--model-layers", type=int, default=2)
+    parser.add_argument("--new-tokens", type=int, default=24, help="문장 조각당 생성할 토큰 수")
+    parser.add_argument("--threads", type=int, help="torch CPU 스레드 수")
+    parser.add_argument("--work-dir", help="사전/캐시/로그를 둘 폴더 (없으면 임시 폴더를 쓰고 끝나면 지움)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.1, help="기준보다 이 비율 이상 느려지면 회귀로 표시")
+    parser.add_argument("--fail-on-regression", action="store_true", help="회귀가 있으면 종료 코드 1")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="talkoo-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+
+    # 실제 설정/캐시/로그를 건드리지 않고, 매번 같은 일을 하도록 결과 재사용은 끈다
+    config.debug_mod = False
+    config.log_path = os.path.join(work_dir, "log")
+    config.cache_path = os.path.join(work_dir, "cache")
+    config.tkdic_path = os.path.join(work_dir, "tkdics")
+    config.cache_enabled = False
+    config.translation_memory = False
+    config.gemini_integration = False
+    config.nomal_trans = True
+    config.per_post_trans = True
+    os.makedirs(config.tkdic_path, exist_ok=True)
+
+    dictionaries = {}
+    for size in sorted(set(args.sizes)):
+        name = f"bench_{size}.tkdic"
+        write_dictionary(os.path.join(config.tkdic_path, name), size)
+        dictionaries[size] = name
+    terms = [_term(index) for index in range(min(dictionaries))]
+    inputs = {shape: make_input(shape, terms) for shape in args.inputs}
+
+    tokenizer, model = build_model(work_dir, terms, args.model_dim, args.model_layers)
+    fix_output_length(model, args.new_tokens)
+
+    results = []
+    for name, size, shape, func in cases(tokenizer, model, inputs, dictionaries):
+        if name not in args.only:
+            continue
+        row = {"name": name, "dict_size": size, "input": shape, "chars": len(inputs[shape]) if shape else None}
+        row.update(measure(func, args.repeats, args.min_seconds))
+        results.append(row)
+        print(json.dumps(row, ensure_ascii=False), flush=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    logger.shutdown()
+    print()
+    print(f"{'benchmark':<20} {'dict':>7} {'input':<7} {'ms':>11} {'min':>11} {'loops':>6} {'base_ms':>11} {'change':>8}")
+    for r in results:
+        base = f"{r['baseline_ms']:>11.3f} {r['change'] * 100:>+7.1f}%" if "change" in r else f"{'-':>11} {'-':>8}"
+        flag = " !" if r in regressions else ""
+        print(f"{r['name']:<20} {r['dict_size'] or '-':>7} {r['input'] or '-':<7} {r['ms']:>11.3f} {r['ms_min']:>11.3f} {r['loops']:>6} {base}{flag}")
+
+    if args.json:
+        meta = {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+            "model_dim": args.model_dim,
+            "model_layers": args.model_layers,
+            "new_tokens": args.new_tokens,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if regressions:
+        print(f"\n기준보다 {args.threshold * 100:.0f}% 이상 느려진 항목 {len(regressions)}개")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
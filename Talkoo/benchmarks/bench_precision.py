@@ -0,0 +1,134 @@
+import argparse
+import gc
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+# src 모듈을 그대로 사용
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import torch
+from rapidfuzz import fuzz
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+import config
+from model_precision import PRECISIONS, apply_precision, load_kwargs
+from talkoo import MODEL_NAMES
+from translator.generation import run_generate
+
+# MODEL_TYPE × 정밀도(fp32/bf16/int8)별 지연 시간, 메모리, fp32 대비 번역 차이를 측정
+
+SAMPLES = [
+    "I want to kill two birds with one stone.",
+    "The Apple Pencil works with every iPad released since 2018.",
+    "Please restart the application after changing the dictionary settings.",
+    "Machine learning models can be compressed without losing much accuracy.",
+    "She said the meeting had been moved to Thursday afternoon.",
+    "If the translation looks wrong, check the glossary entry for that term.",
+    "Our servers only have CPUs, so memory bandwidth is usually the bottleneck.",
+    "The quick brown fox jumps over the lazy dog.",
+]
+
+
+def _rss_mb() -> float | None:
+    # 현재 프로세스 상주 메모리 (psutil이 없으면 /proc, 둘 다 없으면 측정 생략)
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _model_mb(model) -> float:
+    # 양자화된 Linear 가중치는 parameters()에 잡히지 않으므로 state_dict 직렬화 크기로 계산
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 2 ** 20
+
+
+def bench(model_name: str, precision: str, tokenizer, repeats: int, batch_size: int) -> tuple[dict, list[str]]:
+    gc.collect()
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name, **load_kwargs(precision))
+    model = apply_precision(model, precision)
+    load_seconds = time.perf_counter() - start
+
+    batches = [SAMPLES[i:i + batch_size] for i in range(0, len(SAMPLES), batch_size)]
+    run_generate(batches[0][:1], tokenizer, model, "cpu")  # 워밍업
+
+    latencies = []
+    outputs = []
+    for _ in range(repeats):
+        outputs = []
+        start = time.perf_counter()
+        for batch in batches:
+            outputs.extend(run_generate(batch, tokenizer, model, "cpu"))
+        latencies.append((time.perf_counter() - start) * 1000 / len(SAMPLES))
+
+    rss_after = _rss_mb()
+    result = {
+        "model": model_name,
+        "precision": precision,
+        "load_s": round(load_seconds, 2),
+        "ms_per_sentence": round(statistics.mean(latencies), 1),
+        "ms_per_sentence_min": round(min(latencies), 1),
+        "model_mb": round(_model_mb(model), 1),
+        "rss_delta_mb": round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None,
+    }
+    del model
+    gc.collect()
+    return result, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모델 정밀도별 CPU 추론 벤치마크")
+    parser.add_argument("--model-types", type=int, nargs="+", default=[1], choices=sorted(MODEL_NAMES))
+    parser.add_argument("--model-name", help="MODEL_TYPE 대신 직접 지정할 모델 이름/경로")
+    parser.add_argument("--precisions", nargs="+", default=list(PRECISIONS), choices=PRECISIONS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--threads", type=int, help="torch CPU 스레드 수")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    config.debug_mod = False
+
+    model_names = [args.model_name] if args.model_name else [MODEL_NAMES[model_type] for model_type in args.model_types]
+    results = []
+    for model_name in model_names:
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        reference = None
+        for precision in args.precisions:
+            result, outputs = bench(model_name, precision, tokenizer, args.repeats, args.batch_size)
+            # 같은 모델의 첫 정밀도(기본 fp32) 결과와 비교
+            if reference is None:
+                reference = outputs
+            result["exact_match"] = round(sum(a == b for a, b in zip(reference, outputs)) / len(outputs), 3)
+            result["similarity"] = round(statistics.mean(fuzz.ratio(a, b) for a, b in zip(reference, outputs)), 1)
+            results.append(result)
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+
+    print()
+    print(f"{'model':<36} {'prec':<5} {'load_s':>7} {'ms/sent':>8} {'model_mb':>9} {'rss_mb':>8} {'exact':>6} {'sim':>6}")
+    for r in results:
+        rss = "-" if r["rss_delta_mb"] is None else f"{r['rss_delta_mb']:.0f}"
+        print(f"{r['model'][-36:]:<36} {r['precision']:<5} {r['load_s']:>7.2f} {r['ms_per_sentence']:>8.1f} "
+              f"{r['model_mb']:>9.1f} {rss:>8} {r['exact_match']:>6.2f} {r['similarity']:>6.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
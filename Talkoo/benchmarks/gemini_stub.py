@@ -0,0 +1,89 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Gemini generateContent API를 흉내내는 로컬 서버 (오프라인 벤치마크/테스트용)
+# GEMINI_BASE_URL=http://127.0.0.1:<port> 로 지정하면 Talkoo가 이 서버로 요청을 보낸다
+
+
+class StubState:
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+def _handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with state.lock:
+                state.requests += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                time.sleep(max(0.0, state.latency + random.uniform(-state.jitter, state.jitter)))
+                if random.random() < state.failure_rate:
+                    self._send(503, {"error": {"code": 503, "message": "stub overloaded", "status": "UNAVAILABLE"}})
+                    return
+
+                prompt = json.loads(body)["contents"][0]["parts"][0]["text"]
+                answer = {"trans_text": f"[stub] {len(prompt)}", "reson": "stub response"}
+                self._send(200, {
+                    "candidates": [{
+                        "content": {"role": "model", "parts": [{"text": json.dumps(answer, ensure_ascii=False)}]},
+                        "finishReason": "STOP",
+                        "index": 0,
+                    }],
+                    "modelVersion": "stub",
+                })
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def _send(self, status: int, payload: dict):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def start_stub(port: int = 0, **options) -> tuple[ThreadingHTTPServer, StubState]:
+    # port=0 이면 빈 포트를 자동으로 잡는다. server.server_address[1] 로 확인
+    state = StubState(**options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="gemini-stub", daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 Gemini 대체 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="503을 돌려줄 확률")
+    args = parser.parse_args()
+
+    server, _ = start_stub(args.port, latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate)
+    print(f"Gemini stub: http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -5,36 +5,97 @@ from dotenv import load_dotenv
 def load_config() -> None:
     load_dotenv(override=True)
 
-    global model_type, model_device, device_map
-    global debug_mod, log_path
-    global nomal_trans, per_post_trans, gemini_integration, gemini_api
+    global model_type, model_device, device_map, model_precision
+    global model_pool, model_pool_memory_mb, route_length_chars, route_max_queue
+    global workers, worker_threads, worker_pin
+    global inference_backend, ct2_model_path, ct2_inter_threads, ct2_intra_threads
+    global warmup, warmup_texts, model_drain_timeout
+    global debug_mod, log_path, admin_token
+    global nomal_trans, per_post_trans, batch_trans, gemini_integration, gemini_api
+    global gemini_model, gemini_base_url, gemini_concurrency, gemini_rpm, gemini_timeout, gemini_retries, gemini_backoff
+    global gemini_cache, gemini_cache_memory_size, gemini_cache_disk_size
+    global gemini_async, gemini_job_ttl
     global tkdic_path, tkdic_list, tkdic_select
-    global src_lang, tgt_lang
+    global src_lang, tgt_lang, segment_max_tokens
+    global micro_batch, micro_batch_size, micro_batch_wait_ms, batch_api_size
+    global cache_enabled, cache_path, cache_memory_size, cache_disk_size
+    global translation_memory, tm_memory_size, tm_disk_size
 
     # - < 공통 함수들 > -
     model_type = int(os.getenv("MODEL_TYPE", 1))  # 1~3번, 숫자가 높을수록 모델 크기가 커짐(성능 상승)
     model_device = int(os.getenv("MODEL_DEVICE", 1))  # 0 = 그래픽카드, 1 = CPU
     device_map = int(os.getenv("DEVICE_MAP", 0))  # 0 = 비활성화, 1 = 활성화
+    model_precision = os.getenv("MODEL_PRECISION", "fp32").lower()  # fp32 / bf16 / int8(CPU 동적 양자화)
+    inference_backend = os.getenv("INFERENCE_BACKEND", "torch").lower()  # torch / ctranslate2 (선택 패키지, requirements.txt에 없으므로 pip install ctranslate2 로 따로 설치)
+    ct2_model_path = os.getenv("CT2_MODEL_PATH", "models/ct2")  # 변환된 CTranslate2 모델 보관 위치, 없으면 처음 실행 때 변환
+    ct2_inter_threads = int(os.getenv("CT2_INTER_THREADS", 1))  # 동시에 돌리는 배치 수
+    ct2_intra_threads = int(os.getenv("CT2_INTRA_THREADS", 0))  # 배치 하나가 쓰는 CPU 스레드 수, 0 = 자동
+    warmup = os.getenv("WARMUP", "True").lower() == "true"  # 모델 로드 후 준비 완료 전에 워밍업 번역 실행
+    warmup_texts = [text.strip() for text in os.getenv("WARMUP_TEXTS", "").split("|") if text.strip()]  # "|"로 구분, 비우면 기본 문장
+    model_drain_timeout = float(os.getenv("MODEL_DRAIN_TIMEOUT", 120))  # 모델 교체 시 기존 모델 요청이 끝나기를 기다리는 최대 시간(초)
+
+    # - < 모델 풀 관련 함수들 > -
+    model_pool = [int(value) for value in os.getenv("MODEL_POOL", "").split(",") if value.strip().isdigit()]  # 예: "1,3" = MODEL_TYPE 외에 함께 올려둘 모델
+    model_pool_memory_mb = int(os.getenv("MODEL_POOL_MEMORY_MB", 0))  # 풀 전체 가중치 메모리 예산, 0 = 제한 없음 (기본 모델은 항상 로드)
+    route_length_chars = sorted(int(value) for value in os.getenv("ROUTE_LENGTH_CHARS", "300").split(",") if value.strip().isdigit())  # 입력 길이가 경계를 넘을 때마다 한 단계 큰 모델
+    route_max_queue = int(os.getenv("ROUTE_MAX_QUEUE", 4))  # 고른 모델의 대기 요청이 이 이상이면 가장 한가한 모델로
+
+    # - < 멀티 프로세스 관련 함수들 > -
+    workers = int(os.getenv("WORKERS", 1))  # 2 이상이면 모델을 한번 올린 뒤 fork 해서 워커끼리 가중치를 공유 (리눅스 전용)
+    worker_threads = int(os.getenv("WORKER_THREADS", 0))  # 워커당 torch 스레드 수, 0 = CPU 코어 수 / WORKERS
+    worker_pin = os.getenv("WORKER_PIN", "True").lower() == "true"  # 워커마다 서로 다른 CPU 코어에 고정
 
     # - < - 로그 관련 함수 - > -
     debug_mod = os.getenv("DEBUG_MOD", "True").lower() == "true"
     log_path = os.getenv("LOG_PATH", "log")
+    admin_token = os.getenv("ADMIN_TOKEN", "")  # 프로파일링 같은 관리자 기능용 토큰 (X-Talkoo-Admin-Token), 비어 있으면 사용 안 함
 
     # - < 번역 관련 함수들 > -
     # - < 번역 활성화 함수들 > -
     nomal_trans = os.getenv("NOMAL_TRANS", "True").lower() == "true"
     per_post_trans = os.getenv("PER_POST_TRANS", "True").lower() == "true"
+    batch_trans = os.getenv("BATCH_TRANS", "True").lower() == "true"  # 기본/사전 번역을 한번의 generate로 묶어서 처리
     gemini_integration = os.getenv("GEMINI_INTEGRATION", "False").lower() == "true"
     gemini_api = os.getenv("GEMINI_API_KEY")
 
+    # - < Gemini 호출 관련 함수들 > -
+    gemini_model = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    gemini_base_url = os.getenv("GEMINI_BASE_URL") or None  # 비우면 기본 Gemini 주소, 로컬 대체 서버로 벤치마크할 때 지정
+    gemini_concurrency = int(os.getenv("GEMINI_CONCURRENCY", 4))  # 동시에 보내는 최대 요청 수
+    gemini_rpm = int(os.getenv("GEMINI_RPM", 0))  # 분당 최대 요청 수, 0 = 제한 없음
+    gemini_timeout = float(os.getenv("GEMINI_TIMEOUT", 30))  # 호출 1회당 제한 시간(초)
+    gemini_retries = int(os.getenv("GEMINI_RETRIES", 2))  # 시간 초과/일시 오류 시 재시도 횟수
+    gemini_backoff = float(os.getenv("GEMINI_BACKOFF", 0.5))  # 재시도 대기 시간(초), 재시도마다 2배
+    gemini_async = os.getenv("GEMINI_ASYNC", "False").lower() == "true"  # /translate/ 가 모델 번역만 먼저 돌려주고 Gemini 결과는 job_id로 조회
+    gemini_job_ttl = int(os.getenv("GEMINI_JOB_TTL", 600))  # 끝난 Gemini 작업 결과를 보관하는 시간(초)
+
     # - < 커스텀 사전 관련 함수들 > -
     tkdic_path = os.getenv("TKDIC_PATH", "tkdics")
     tkdic_list = []
     tkdic_select = os.getenv("TKDIC_SELECT", "dd.tkdic")
 
     # -< 번역 함수(설정에 없음) >-
-    src_lang = os.getenv("SRC_LANG", "eng_Latn")
+    src_lang = os.getenv("SRC_LANG", "eng_Latn")  # 요청에 src_lang/tgt_lang이 없을 때의 기본 언어쌍
     tgt_lang = os.getenv("TGT_LANG", "kor_Hang")
+    segment_max_tokens = int(os.getenv("SEGMENT_MAX_TOKENS", 200))  # 긴 입력을 나눌 때 조각당 최대 토큰 수
+
+    # - < 동시 요청 마이크로 배치 관련 함수들 > -
+    micro_batch = os.getenv("MICRO_BATCH", "True").lower() == "true"
+    micro_batch_size = int(os.getenv("MICRO_BATCH_SIZE", 8))  # 한번의 generate에 묶을 최대 문장 수
+    micro_batch_wait_ms = int(os.getenv("MICRO_BATCH_WAIT_MS", 10))  # 배치를 모으기 위해 기다리는 최대 시간
+    batch_api_size = int(os.getenv("BATCH_API_SIZE", 32))  # /translate/batch/ 에서 한번에 모델로 보내는 항목 수
+
+    # - < 번역 캐시 관련 함수들 > -
+    cache_enabled = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+    cache_path = os.getenv("CACHE_PATH", "cache")
+    cache_memory_size = int(os.getenv("CACHE_MEMORY_SIZE", 1000))  # 메모리에 유지할 최대 번역 수
+    cache_disk_size = int(os.getenv("CACHE_DISK_SIZE", 100000))  # 디스크에 유지할 최대 번역 수, 0 = 디스크 캐시 비활성화
+    translation_memory = os.getenv("TRANSLATION_MEMORY", "True").lower() == "true"  # 문장 단위 번역 재사용
+    tm_memory_size = int(os.getenv("TM_MEMORY_SIZE", 10000))
+    tm_disk_size = int(os.getenv("TM_DISK_SIZE", 500000))
+    gemini_cache = os.getenv("GEMINI_CACHE", "True").lower() == "true"  # 같은 입력의 Gemini 다듬기 결과 재사용
+    gemini_cache_memory_size = int(os.getenv("GEMINI_CACHE_MEMORY_SIZE", 1000))
+    gemini_cache_disk_size = int(os.getenv("GEMINI_CACHE_DISK_SIZE", 100000))
 
 
 def reload_config() -> None:
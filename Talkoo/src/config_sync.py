@@ -0,0 +1,111 @@
+import json
+import os
+import time
+import config
+from utils.logger import error, info
+from utils.error_codes import ErrorCode
+
+# 멀티 워커 모드에서는 요청마다 다른 워커가 받으므로 API로 바꾼 설정을 파일로 공유한다
+# 바꾼 워커가 publish → 나머지 워커는 요청이 들어올 때 sync로 파일이 바뀌었는지 확인해 반영
+
+SHARED_KEYS = (
+    "model_type", "model_device", "device_map", "debug_mod", "model_precision",
+    "nomal_trans", "per_post_trans", "gemini_integration", "gemini_api", "tkdic_select",
+)
+_CHECK_INTERVAL = 0.5  # 파일 확인 간격(초)
+
+_applied = {"version": 0, "env_version": 0, "model_version": 0}
+_last_check = 0.0
+_last_mtime = None
+
+
+def enabled() -> bool:
+    return config.workers > 1
+
+
+def _path() -> str:
+    return os.path.join(config.cache_path, "shared_settings.json")
+
+
+def _read() -> dict | None:
+    try:
+        with open(_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        error("공유 설정 파일 읽기 실패", e, ErrorCode.UNKNOWN)
+        return None
+
+
+def publish(reload_env: bool = False, reload_model: bool = False, force: bool = False):
+    # 현재 워커의 설정을 다른 워커에 알린다. reload_env = .env 다시 읽기, reload_model = 모델 교체
+    _write(reload_env, reload_model, force if reload_model else None)
+
+
+def _write(reload_env: bool, reload_model: bool, model_force: bool | None):
+    # model_force: None = 파일에 있던 값 유지 (아직 반영하지 않은 워커가 있을 수 있으므로)
+    global _last_mtime
+    if not enabled():
+        return
+    import fcntl
+
+    os.makedirs(config.cache_path, exist_ok=True)
+    # 여러 워커가 동시에 고쳐도 버전이 꼬이지 않도록 파일 잠금
+    with open(_path() + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        current = _read() or {}
+        data = {
+            "version": current.get("version", 0) + 1,
+            "env_version": current.get("env_version", 0) + (1 if reload_env else 0),
+            "model_version": current.get("model_version", 0) + (1 if reload_model else 0),
+            "model_force": model_force if model_force is not None else current.get("model_force", False),
+            "settings": {key: getattr(config, key) for key in SHARED_KEYS},
+        }
+        temp_path = f"{_path()}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, _path())
+        _last_mtime = os.stat(_path()).st_mtime_ns
+    # 직접 바꾼 내용은 다시 반영하지 않는다
+    _applied.update(version=data["version"], env_version=data["env_version"], model_version=data["model_version"])
+
+
+def reset():
+    # 멀티 워커 시작 시 fork 전에 부모에서 호출: 지난 실행이 남긴 공유 설정 파일을 지금 설정(.env)으로 다시 쓴다
+    # 버전은 이어서 올리되 리로드 버전은 그대로 두고 _applied/_last_mtime을 맞춰두므로,
+    # 이 상태를 물려받은 워커는 시작한 뒤에 다른 워커가 바꾼 설정만 반영한다 (지난 실행의 모델 교체를 다시 하지 않음)
+    _write(reload_env=False, reload_model=False, model_force=False)
+    info(f"공유 설정 파일 초기화 (버전 {_applied['version']})")
+
+
+def sync():
+    # 다른 워커가 바꾼 설정이 있으면 반영
+    global _last_check, _last_mtime
+    if not enabled():
+        return
+    now = time.monotonic()
+    if now - _last_check < _CHECK_INTERVAL:
+        return
+    _last_check = now
+    try:
+        mtime = os.stat(_path()).st_mtime_ns
+    except OSError:
+        return
+    if mtime == _last_mtime:
+        return
+    _last_mtime = mtime
+
+    data = _read()
+    if data is None or data.get("version", 0) == _applied["version"]:
+        return
+    if data.get("env_version", 0) != _applied["env_version"]:
+        config.reload_config()
+    for key, value in data.get("settings", {}).items():
+        if key in SHARED_KEYS:
+            setattr(config, key, value)
+    if data.get("model_version", 0) != _applied["model_version"]:
+        import model_manager
+        model_manager.reload(data.get("model_force", False))
+    _applied.update(version=data["version"], env_version=data.get("env_version", 0), model_version=data.get("model_version", 0))
+    info(f"다른 워커에서 바꾼 설정 반영 (버전 {data['version']})")
@@ -0,0 +1,131 @@
+import glob
+import hashlib
+import os
+import threading
+import config
+from customDICT.tkdic_binary import EXTENSION, MappedDictionary, compile_tkdic, open_compiled, read_header, write_compiled
+from utils import metrics
+from utils.logger import debug, info, error
+from utils.error_codes import ErrorCode
+
+
+class CompiledDictionary:
+    # 컴파일된(.tkdicb) 사전을 mmap 으로 연 상태. 엔트리는 필요할 때만 문자열로 꺼낸다
+    def __init__(self, path: str, signature: tuple, data: MappedDictionary):
+        self.path = path
+        self.signature = signature
+        self.data = data
+        self.content_hash = data.content_hash
+        self.main_fuzzy = data.main_fuzzy
+        self.index = data.index
+        self.term_count = data.term_count
+
+    @property
+    def entries(self) -> list:
+        return self.data.entries()
+
+
+_registry = {}
+_lock = threading.Lock()
+
+
+def _signature(stat: os.stat_result) -> tuple:
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _compiled_dir() -> str:
+    return os.path.join(config.cache_path, "tkdic")
+
+
+def _compiled_prefix(source_path: str) -> str:
+    # 이름이 같은 사전이 다른 폴더에 있어도 겹치지 않도록 경로 해시를 붙인다
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    path_hash = hashlib.sha1(source_path.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(_compiled_dir(), f"{name}-{path_hash}-")
+
+
+def _find_compiled(source_path: str, signature: tuple, content_hash: str | None) -> str | None:
+    for path in glob.glob(glob.escape(_compiled_prefix(source_path)) + "*" + EXTENSION):
+        header = read_header(path)
+        if header is None:
+            continue
+        if content_hash is None:
+            if (header.source_mtime_ns, header.source_size) == signature:
+                return path
+        elif header.content_hash == content_hash:
+            return path
+    return None
+
+
+def _remove_stale(source_path: str, keep: str | None):
+    # 다른 프로세스가 매핑 중인 파일은 (Windows 에서) 지워지지 않으므로 실패는 무시한다
+    for path in glob.glob(glob.escape(_compiled_prefix(source_path)) + "*" + EXTENSION):
+        if path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _load(source_path: str, stat: os.stat_result) -> MappedDictionary:
+    signature = _signature(stat)
+    # 원본이 바뀌지 않았으면 원본을 읽지 않고 컴파일된 파일만 연다
+    compiled_path = _find_compiled(source_path, signature, None)
+    if compiled_path is not None:
+        return open_compiled(compiled_path)
+
+    with open(source_path, 'rb') as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+    compiled_path = _find_compiled(source_path, signature, content_hash)
+    if compiled_path is not None:
+        return open_compiled(compiled_path)
+
+    data = compile_tkdic(source_path, stat, content_hash)
+    # 매핑 중인 파일을 덮어쓰지 않도록 내용 해시별로 파일을 따로 만든다
+    compiled_path = _compiled_prefix(source_path) + content_hash[:16] + EXTENSION
+    try:
+        write_compiled(data, compiled_path)
+    except OSError as e:
+        error("컴파일된 사전 저장 실패, 메모리에서 직접 사용합니다.", e, ErrorCode.CACHE_ERROR)
+        return MappedDictionary(data)
+    _remove_stale(source_path, compiled_path)
+    info(f"사전 컴파일 완료 : {os.path.basename(source_path)} -> {os.path.basename(compiled_path)}")
+    return open_compiled(compiled_path)
+
+
+def get_dictionary(file_path: str) -> CompiledDictionary:
+    # 파일이 바뀌지 않았으면 이미 열어둔 사전을 그대로 돌려준다
+    key = os.path.abspath(file_path)
+    stat = os.stat(key)
+    signature = _signature(stat)
+    cached = _registry.get(key)
+    if cached is not None and cached.signature == signature:
+        return cached
+
+    with _lock:
+        cached = _registry.get(key)
+        if cached is not None and cached.signature == signature:
+            return cached
+
+        # 원본이 바뀌었으면 다시 컴파일, 아니면 컴파일된 파일만 연다
+        with metrics.stage("dict_load"):
+            data = _load(key, stat)
+        # mtime만 바뀌고 내용은 같은 경우 기존 사전을 계속 사용
+        if cached is not None and cached.content_hash == data.content_hash:
+            cached.signature = signature
+            return cached
+
+        dictionary = CompiledDictionary(key, signature, data)
+        _registry[key] = dictionary
+        info(f"사전 로드 완료 : {os.path.basename(key)} ({dictionary.term_count}개 항목)")
+        return dictionary
+
+
+def invalidate(file_path: str):
+    key = os.path.abspath(file_path)
+    with _lock:
+        if _registry.pop(key, None) is not None:
+            debug(f"사전 캐시 무효화 : {os.path.basename(file_path)}")
+        # 삭제된 사전은 컴파일 파일도 정리
+        if not os.path.exists(key):
+            _remove_stale(key, None)
@@ -0,0 +1,152 @@
+import math
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+# thefuzz.process.extractOne 은 양쪽 문자열을 default_process 하고 128~255 범위 문자를 제거(force_ascii)한 뒤 WRatio로 비교한다
+_ASCII_ONLY = {i: None for i in range(128, 256)}
+_GRAM_SIZE = 3
+# 후보로 올리기 위해 비교하는 두 문자열의 3-gram 중 겹쳐야 하는 최소 비율
+# 텍스트에 그대로 들어있는 용어는 3-gram이 모두 겹치므로 항상 후보가 된다
+MIN_GRAM_OVERLAP = 0.4
+
+
+def _grams(text: str) -> set:
+    return {text[i:i + _GRAM_SIZE] for i in range(len(text) - _GRAM_SIZE + 1)}
+
+
+def _required(gram_count: int) -> int:
+    return max(1, math.ceil(gram_count * MIN_GRAM_OVERLAP))
+
+
+class DictTerm:
+    # 사전 엔트리 하나를 매칭에 바로 쓸 수 있게 미리 가공해 둔 형태
+    __slots__ = ("index", "word", "word_lower", "kor", "fuzzy", "is_phrase")
+
+    def __init__(self, index: int, word: str, kor: str, fuzzy: int):
+        self.index = index
+        self.word = word
+        self.word_lower = word.lower()
+        self.kor = kor
+        self.fuzzy = fuzzy
+        self.is_phrase = len(self.word_lower.split()) > 1
+
+
+def word_key(word_lower: str) -> str:
+    return default_process(default_process(word_lower).translate(_ASCII_ONLY))
+
+
+class _TermGroup:
+    # 단어/구 엔트리 묶음별 검색 인덱스 (정확 일치 해시 + 3-gram 역색인)
+    # 컴파일된 사전(tkdic_binary)의 매핑 인덱스도 같은 메서드를 제공한다
+    def __init__(self, terms: list, keys: list[str]):
+        self.terms = []
+        self.keys = []
+        thresholds = []
+        required = []
+        exact = {}
+        postings = {}
+
+        for term, key in zip(terms, keys):
+            if not key:
+                continue
+            position = len(self.terms)
+            self.terms.append(term)
+            self.keys.append(key)
+            thresholds.append(term.fuzzy)
+            exact.setdefault(key, []).append(position)
+
+            # 3글자 미만 용어는 3-gram이 없으므로 정확 일치로만 찾는다
+            grams = _grams(key)
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+            required.append(_required(len(grams)))
+
+        self.size = len(self.terms)
+        self.thresholds = np.array(thresholds, dtype=np.int32)
+        self.required = np.array(required, dtype=np.int32)
+        self.exact = exact
+        self.postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    def key(self, position: int) -> str:
+        return self.keys[position]
+
+    def term(self, position: int) -> DictTerm:
+        return self.terms[position]
+
+    def exact_positions(self, key: str):
+        return self.exact.get(key, ())
+
+    def gram_postings(self, grams) -> list:
+        return [self.postings[gram] for gram in grams if gram in self.postings]
+
+
+def _candidates(group, grams: set) -> np.ndarray:
+    lists = group.gram_postings(grams)
+    if not lists:
+        return np.empty(0, dtype=np.int64)
+    positions, counts = np.unique(np.concatenate(lists), return_counts=True)
+    enough = (counts >= group.required[positions]) & (counts >= _required(len(grams)))
+    return positions[enough]
+
+
+class GlossaryIndex:
+    def __init__(self, words, phrases):
+        self.words = words
+        self.phrases = phrases
+
+    @classmethod
+    def from_terms(cls, terms: list) -> "GlossaryIndex":
+        words = [term for term in terms if not term.is_phrase]
+        phrases = [term for term in terms if term.is_phrase]
+        return cls(_TermGroup(words, [word_key(term.word_lower) for term in words]),
+                   _TermGroup(phrases, [term.word_lower for term in phrases]))
+
+    def match(self, text: str) -> list:
+        # 기존 엔트리별 extractOne / partial_ratio 판정과 같은 점수·임계값으로 일치 항목을 찾는다
+        matched = set()
+        if self.words.size:
+            matched.update(self._match_words(text))
+        if self.phrases.size:
+            matched.update(self._match_phrases(text.lower()))
+        return sorted(matched, key=lambda term: term.index)
+
+    def _match_words(self, text: str) -> list:
+        group = self.words
+        text_words = [default_process(word.strip('.,?!').lower().translate(_ASCII_ONLY)) for word in text.split()]
+        text_words = [word for word in text_words if word]
+        if not text_words:
+            return []
+
+        exact_positions = set()
+        candidate_positions = set()
+        for word in set(text_words):
+            exact_positions.update(int(p) for p in group.exact_positions(word))
+            candidate_positions.update(_candidates(group, _grams(word)).tolist())
+
+        matched = [group.term(p) for p in exact_positions]
+        positions = list(candidate_positions - exact_positions)
+        if not positions:
+            return matched
+
+        scores = process.cdist([group.key(p) for p in positions], text_words, scorer=fuzz.WRatio, workers=1)
+        best = np.round(scores.max(axis=1))
+        for position, score in zip(positions, best):
+            if score >= group.thresholds[position]:
+                matched.append(group.term(position))
+        return matched
+
+    def _match_phrases(self, text_lower: str) -> list:
+        group = self.phrases
+        lists = group.gram_postings(_grams(text_lower))
+        if not lists:
+            return []
+        # 구는 긴 텍스트 전체와 partial_ratio로 비교하므로 구 쪽 3-gram 기준으로만 거른다
+        positions, counts = np.unique(np.concatenate(lists), return_counts=True)
+        positions = positions[counts >= group.required[positions]].tolist()
+        if not positions:
+            return []
+
+        scores = process.cdist([group.key(p) for p in positions], [text_lower], scorer=fuzz.partial_ratio, workers=1)
+        best = np.round(scores[:, 0])
+        return [group.term(p) for p, score in zip(positions, best) if score >= group.thresholds[p]]
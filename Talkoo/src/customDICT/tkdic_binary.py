@@ -0,0 +1,257 @@
+import hashlib
+import mmap
+import os
+import struct
+import numpy as np
+from customDICT.tkdic_paser import parse_tkdic
+from customDICT.glossary_index import DictTerm, GlossaryIndex
+from utils import metrics
+
+# 컴파일된 사전 파일(.tkdicb) 구조 (리틀 엔디언)
+#   헤더 | 섹션 목록(이름, 오프셋, 길이) | 섹션 데이터(8바이트 정렬)
+# 파일 전체를 mmap 으로 열고 numpy 배열을 그 위에 바로 올리므로, 여러 프로세스가 같은 페이지 캐시를 공유한다
+MAGIC = b"TKDB"
+VERSION = 1
+EXTENSION = ".tkdicb"
+
+# main_fuzzy 헤더가 없는 사전의 기본 임계값 (/dict/entry/ 새 파일 기본값과 동일)
+DEFAULT_FUZZY = 85
+
+_HEADER = struct.Struct("<4sHHqq32siII")
+_SECTION = struct.Struct("<8sQQ")
+_NO_VALUE = -1
+_NO_MAIN_FUZZY = -2 ** 31
+
+# 엔트리 테이블: 문자열 테이블 위치 + 원본 fuzzy(-1 = 없음) + 실제 적용 임계값
+ENTRY_DTYPE = np.dtype([
+    ("word_offset", "<u4"), ("word_length", "<u4"),
+    ("kor_offset", "<u4"), ("kor_length", "<u4"),
+    ("fuzzy", "<i2"), ("threshold", "u1"), ("has_kor", "u1"),
+])
+
+
+def _hash(text: str) -> int:
+    # 프로세스마다 값이 바뀌는 hash() 대신 고정된 64비트 해시를 사용
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class TkdicHeader:
+    __slots__ = ("source_mtime_ns", "source_size", "content_hash", "main_fuzzy", "entry_count")
+
+    def __init__(self, source_mtime_ns: int, source_size: int, content_hash: str, main_fuzzy, entry_count: int):
+        self.source_mtime_ns = source_mtime_ns
+        self.source_size = source_size
+        self.content_hash = content_hash
+        self.main_fuzzy = main_fuzzy
+        self.entry_count = entry_count
+
+
+def _unpack_header(data) -> tuple[TkdicHeader, int]:
+    magic, version, _, mtime_ns, size, digest, main_fuzzy, entry_count, section_count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("지원하지 않는 컴파일 사전 형식입니다.")
+    header = TkdicHeader(mtime_ns, size, digest.hex(), None if main_fuzzy == _NO_MAIN_FUZZY else main_fuzzy, entry_count)
+    return header, section_count
+
+
+def read_header(path: str) -> TkdicHeader | None:
+    try:
+        with open(path, "rb") as f:
+            return _unpack_header(f.read(_HEADER.size))[0]
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+class _StringTable:
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+
+    def add(self, text: str) -> tuple[int, int]:
+        data = text.encode("utf-8")
+        offset = self.length
+        self.chunks.append(data)
+        self.length += len(data)
+        return offset, len(data)
+
+    def tobytes(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+def _group_sections(prefix: str, group) -> dict:
+    keys = _StringTable()
+    key_offsets = [0]
+    for key in group.keys:
+        keys.add(key)
+        key_offsets.append(keys.length)
+
+    exact = sorted((_hash(key), position) for key, positions in group.exact.items() for position in positions)
+    grams = sorted((_hash(gram), ids) for gram, ids in group.postings.items())
+    gram_offsets = [0]
+    for _, ids in grams:
+        gram_offsets.append(gram_offsets[-1] + len(ids))
+
+    return {
+        f"{prefix}.ids": np.array([term.index for term in group.terms], dtype="<u4"),
+        f"{prefix}.keyoff": np.array(key_offsets, dtype="<u4"),
+        f"{prefix}.keys": keys.tobytes(),
+        f"{prefix}.thresh": np.array(group.thresholds, dtype="u1"),
+        f"{prefix}.req": np.array(group.required, dtype="<u2"),
+        f"{prefix}.exhash": np.array([h for h, _ in exact], dtype="<u8"),
+        f"{prefix}.expos": np.array([p for _, p in exact], dtype="<u4"),
+        f"{prefix}.grhash": np.array([h for h, _ in grams], dtype="<u8"),
+        f"{prefix}.groff": np.array(gram_offsets, dtype="<u4"),
+        f"{prefix}.grpost": np.concatenate([ids for _, ids in grams]).astype("<u4") if grams else np.empty(0, dtype="<u4"),
+    }
+
+
+def compile_tkdic(source_path: str, source_stat: os.stat_result, content_hash: str) -> bytes:
+    with metrics.stage("dict_parse"):
+        main_fuzzy, entries = parse_tkdic(source_path)
+    entries = entries or []
+    default_fuzzy = main_fuzzy if isinstance(main_fuzzy, int) else DEFAULT_FUZZY
+
+    strings = _StringTable()
+    rows = []
+    terms = []
+    for index, entry in enumerate(entries):
+        word = entry.get('word', '')
+        kor = entry.get('kor')
+        fuzzy = entry.get('fuzzy')
+        threshold = fuzzy if isinstance(fuzzy, int) else default_fuzzy
+        rows.append((
+            *strings.add(word),
+            *strings.add(kor or ''),
+            fuzzy if isinstance(fuzzy, int) else _NO_VALUE,
+            min(max(threshold, 0), 255),
+            kor is not None,
+        ))
+        if word.strip():
+            terms.append(DictTerm(index, word.strip(), kor or '', threshold))
+    table = np.array(rows, dtype=ENTRY_DTYPE)
+
+    index = GlossaryIndex.from_terms(terms)
+    sections = {"entries": table, "strings": strings.tobytes()}
+    sections.update(_group_sections("w", index.words))
+    sections.update(_group_sections("p", index.phrases))
+
+    header_size = _HEADER.size + _SECTION.size * len(sections)
+    directory = []
+    body = bytearray()
+    offset = (header_size + 7) & ~7
+    for name, value in sections.items():
+        data = value.tobytes() if isinstance(value, np.ndarray) else value
+        body += b"\0" * (((offset + len(body) + 7) & ~7) - offset - len(body))
+        directory.append(_SECTION.pack(name.encode("ascii"), offset + len(body), len(data)))
+        body += data
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, 0, source_stat.st_mtime_ns, source_stat.st_size, bytes.fromhex(content_hash),
+        main_fuzzy if isinstance(main_fuzzy, int) else _NO_MAIN_FUZZY, len(entries), len(sections)
+    )
+    prefix = header + b"".join(directory)
+    return prefix + b"\0" * (((header_size + 7) & ~7) - header_size) + bytes(body)
+
+
+def write_compiled(data: bytes, path: str):
+    # 다른 프로세스가 읽는 중일 수 있으므로 임시 파일에 쓴 뒤 교체
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class _MappedTermGroup:
+    # glossary_index._TermGroup 과 같은 메서드를 컴파일된 배열 위에서 제공
+    def __init__(self, dictionary: "MappedDictionary", prefix: str):
+        self.dictionary = dictionary
+        self.ids = dictionary._array(f"{prefix}.ids", "<u4")
+        self.key_offsets = dictionary._array(f"{prefix}.keyoff", "<u4")
+        self.keys = dictionary._blob(f"{prefix}.keys")
+        self.thresholds = dictionary._array(f"{prefix}.thresh", "u1")
+        self.required = dictionary._array(f"{prefix}.req", "<u2")
+        self.exact_hashes = dictionary._array(f"{prefix}.exhash", "<u8")
+        self.exact = dictionary._array(f"{prefix}.expos", "<u4")
+        self.gram_hashes = dictionary._array(f"{prefix}.grhash", "<u8")
+        self.gram_offsets = dictionary._array(f"{prefix}.groff", "<u4")
+        self.postings = dictionary._array(f"{prefix}.grpost", "<u4")
+        self.size = len(self.ids)
+
+    def key(self, position: int) -> str:
+        return str(self.keys[self.key_offsets[position]:self.key_offsets[position + 1]], "utf-8")
+
+    def term(self, position: int) -> DictTerm:
+        return self.dictionary.term(int(self.ids[position]))
+
+    def exact_positions(self, key: str):
+        value = np.uint64(_hash(key))
+        start = np.searchsorted(self.exact_hashes, value, side="left")
+        end = np.searchsorted(self.exact_hashes, value, side="right")
+        return [int(p) for p in self.exact[start:end] if self.key(int(p)) == key]
+
+    def gram_postings(self, grams) -> list:
+        if not grams or not len(self.gram_hashes):
+            return []
+        values = np.fromiter((_hash(gram) for gram in grams), dtype=np.uint64, count=len(grams))
+        positions = np.minimum(np.searchsorted(self.gram_hashes, values), len(self.gram_hashes) - 1)
+        found = positions[self.gram_hashes[positions] == values]
+        return [self.postings[start:end] for start, end in zip(self.gram_offsets[found], self.gram_offsets[found + 1])]
+
+
+class MappedDictionary:
+    def __init__(self, buffer, path: str | None = None):
+        self.path = path
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self.header, section_count = _unpack_header(self._view)
+        self._sections = {}
+        for i in range(section_count):
+            name, offset, length = _SECTION.unpack_from(self._view, _HEADER.size + _SECTION.size * i)
+            self._sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+
+        self.main_fuzzy = self.header.main_fuzzy
+        self.content_hash = self.header.content_hash
+        self.table = self._array("entries", ENTRY_DTYPE)
+        self.strings = self._blob("strings")
+        self.index = GlossaryIndex(_MappedTermGroup(self, "w"), _MappedTermGroup(self, "p"))
+        self.term_count = self.index.words.size + self.index.phrases.size
+
+    def _array(self, name: str, dtype) -> np.ndarray:
+        offset, length = self._sections[name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self._buffer, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+    def _blob(self, name: str) -> memoryview:
+        offset, length = self._sections[name]
+        return self._view[offset:offset + length]
+
+    def _string(self, offset, length) -> str:
+        return str(self.strings[offset:offset + length], "utf-8")
+
+    def term(self, index: int) -> DictTerm:
+        record = self.table[index]
+        return DictTerm(
+            index,
+            self._string(record["word_offset"], record["word_length"]).strip(),
+            self._string(record["kor_offset"], record["kor_length"]),
+            int(record["threshold"])
+        )
+
+    def entries(self) -> list:
+        # parse_tkdic 결과와 같은 형태 (/dict/entries 용)
+        results = []
+        for record in self.table:
+            entry = {'word': self._string(record["word_offset"], record["word_length"])}
+            if record["has_kor"]:
+                entry['kor'] = self._string(record["kor_offset"], record["kor_length"])
+            if record["fuzzy"] != _NO_VALUE:
+                entry['fuzzy'] = int(record["fuzzy"])
+            results.append(entry)
+        return results
+
+
+def open_compiled(path: str) -> MappedDictionary:
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return MappedDictionary(mapped, path)
@@ -10,7 +10,7 @@ def parse_tkdic(file_path):
         for line in file:
             line = line.strip() 
             if is_reading_word:
-                info("word 객체를 읽는중..")
+                debug("word 객체를 읽는중..")
                 if line.endswith(']'):
                     debug(f"읽어온 라인 : {line}")
                     content = line[:-1]
@@ -18,7 +18,7 @@ def parse_tkdic(file_path):
                     current_entry['word'] += content
                     is_reading_word = False
                 else:
-                    info("word 객체를 읽고있지 않음")
+                    debug("word 객체를 읽고있지 않음")
                     current_entry['word'] += line + ' '
                     debug(f"읽어온 라인 : {line}")
 
@@ -50,7 +50,7 @@ def parse_tkdic(file_path):
         if current_entry:
             final_results.append(current_entry)
 
-        info(f"{main_fuzzy_value}, {final_results}")
+        info(f"사전 파싱 완료 : main_fuzzy={main_fuzzy_value}, {len(final_results)}개 항목")
         return main_fuzzy_value, final_results
                      
                     
@@ -1,3 +1,4 @@
+import os
 import threading
 import time
 import webbrowser
@@ -5,9 +6,11 @@ import urllib.request
 import urllib.error
 import sys
 import uvicorn
-from talkoo import Talkoo
 from talkoo_api import app
+import config
 from config import load_config
+import model_manager
+import workers
 from pathlib import Path
 
 
@@ -48,17 +51,18 @@ if __name__ == "__main__":
     BASE_URL = f"http://{HOST}:{PORT}"
     HEALTH_URL = f"{BASE_URL}/health"
 
-    talkoo_translator = Talkoo()
-    app.state.tokenizer = talkoo_translator.tokenizer
-    app.state.base_model = talkoo_translator.base_model
-    app.state.device = talkoo_translator.actual_device
-
     load_config()
-    
+
     threading.Thread(
         target=wait_and_open_browser,
         args=(HEALTH_URL,),
         daemon=True
     ).start()
 
-    uvicorn.run(app, host=HOST, port=PORT, log_level="info")
+    if config.workers > 1 and hasattr(os, "fork"):
+        # 모델을 한번 올린 뒤 워커 프로세스들이 나눠 쓴다
+        workers.serve(app, HOST, PORT)
+    else:
+        # 모델은 백그라운드에서 불러오고 서버는 바로 띄운다 (/health = 생존, /ready = 번역 가능 여부)
+        model_manager.start_loading()
+        uvicorn.run(app, host=HOST, port=PORT, log_level="info")
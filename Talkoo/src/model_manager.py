@@ -0,0 +1,420 @@
+import gc
+import threading
+import time
+import torch
+import config
+from talkoo import Talkoo, MODEL_NAMES
+from translator import generation
+from translator.backends import model_identity
+from translator.batch_scheduler import get_scheduler, start_scheduler, stop_scheduler
+from utils.logger import error, info
+from utils.error_codes import ErrorCode
+
+# 서버는 바로 띄우고 모델은 백그라운드에서 불러온다
+# state: idle → loading → warming → ready (실패 시 failed), 멀티 워커는 loading → loaded(부모) → warming → ready(워커)
+# MODEL_POOL을 지정하면 여러 크기의 모델을 메모리 예산 안에서 함께 올려두고 요청마다 골라 쓴다
+
+# WARMUP_TEXTS를 비워두면 쓰는 기본 워밍업 문장 (짧은/중간/긴 입력 모양을 한번씩 거치도록)
+DEFAULT_WARMUP_TEXTS = [
+    "Hello.",
+    "Please restart the application after changing the dictionary settings.",
+    "Machine learning models can be compressed without losing much accuracy, "
+    "but the first request after startup is usually much slower than the rest.",
+]
+
+# 로드 전에 메모리 예산을 따져볼 때 쓰는 대략적인 파라미터 수
+MODEL_PARAMS = {1: 0.6e9, 2: 1.3e9, 3: 3.3e9}
+_BYTES_PER_PARAM = {"fp32": 4, "bf16": 2, "int8": 2}  # int8은 임베딩이 fp32로 남으므로 넉넉하게
+
+# 품질/지연 힌트: latency = 가장 작은 모델, quality = 가장 큰 모델, 그 외 = 길이/대기열로 자동 선택
+QUALITY_HINTS = ("latency", "quality")
+
+
+class LoadedModel:
+    __slots__ = ("tokenizer", "base_model", "device", "model_type", "memory_mb", "in_flight", "retired")
+
+    def __init__(self, tokenizer, base_model, device, model_type: int):
+        self.tokenizer = tokenizer
+        self.base_model = base_model
+        self.device = device
+        self.model_type = model_type
+        self.memory_mb = None
+        # 이 모델로 처리 중인 요청 수 (라우팅 대기열 기준, 교체 후에는 0이 될 때까지 기다렸다가 비운다)
+        self.in_flight = 0
+        # 교체 대기 시간 안에 요청이 끝나지 않은 기존 모델: 마지막 release에서 비운다
+        self.retired = False
+
+    @property
+    def name(self) -> str:
+        return getattr(self.base_model, "name_or_path", "") or MODEL_NAMES.get(self.model_type, "")
+
+
+def _pool_types() -> list[int]:
+    # 기본 모델(MODEL_TYPE)을 먼저, 그다음 MODEL_POOL 순서대로
+    types = [config.model_type if config.model_type in MODEL_NAMES else 1]
+    for model_type in config.model_pool:
+        if model_type in MODEL_NAMES and model_type not in types:
+            types.append(model_type)
+    return types
+
+
+def _model_signature() -> tuple:
+    # 이 값이 같으면 같은 모델이 다시 로드되므로 리로드를 건너뛴다
+    return (tuple(_pool_types()), config.model_pool_memory_mb, config.model_device, config.device_map,
+            config.model_precision, config.inference_backend)
+
+
+def _estimate_mb(model_type: int) -> float:
+    return MODEL_PARAMS[model_type] * _BYTES_PER_PARAM.get(config.model_precision, 4) / 2 ** 20
+
+
+def _model_mb(base_model, model_type: int) -> float:
+    # 실제 올라간 가중치 크기. 공유 임베딩은 한번만 세고, 동적 양자화 가중치(packed params)까지 포함
+    if not isinstance(base_model, torch.nn.Module):
+        return round(_estimate_mb(model_type), 1)
+    seen = set()
+    total = 0
+    for value in base_model.state_dict().values():
+        for tensor in (value if isinstance(value, tuple) else (value,)):
+            if isinstance(tensor, torch.Tensor) and tensor.data_ptr() not in seen:
+                seen.add(tensor.data_ptr())
+                total += tensor.numel() * tensor.element_size()
+    return round(total / 2 ** 20, 1)
+
+
+def _queue_depth(loaded: LoadedModel) -> int:
+    scheduler = get_scheduler(loaded.base_model)
+    return loaded.in_flight + (scheduler.queue_depth if scheduler is not None else 0)
+
+
+def route(pool: list[LoadedModel], text_length: int, quality: str | None) -> LoadedModel:
+    # pool은 작은 모델부터 정렬되어 있다
+    if quality == "latency":
+        return pool[0]
+    if quality == "quality":
+        return pool[-1]
+
+    # 입력 길이가 ROUTE_LENGTH_CHARS 경계를 하나 넘을 때마다 한 단계 큰 모델
+    rank = sum(1 for threshold in config.route_length_chars if text_length >= threshold)
+    chosen = pool[min(rank, len(pool) - 1)]
+    if len(pool) > 1 and _queue_depth(chosen) >= config.route_max_queue:
+        # 고른 모델이 밀려 있으면 가장 한가한 모델로 넘긴다 (같으면 원래 고른 모델)
+        chosen = min(pool, key=lambda loaded: (_queue_depth(loaded), loaded is not chosen))
+    return chosen
+
+
+class ModelManager:
+    def __init__(self):
+        self.state = "idle"
+        self.detail = ""
+        self.loaded: LoadedModel | None = None  # 기본 모델 (MODEL_TYPE)
+        self.pool: list[LoadedModel] = []
+        self.signature = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.reload_state = "idle"  # idle → loading → warming → draining → releasing → done (실패 시 failed)
+        self.reload_detail = ""
+        self.reload_started = None
+        self.reload_finished = None
+        self._previous: list[LoadedModel] = []
+        self._preloaded = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self._reload_thread = None
+
+    def start(self) -> bool:
+        # 이미 불러오는 중이거나 준비가 끝났으면 다시 시작하지 않음
+        with self._cond:
+            if self.state in ("loading", "loaded", "warming", "ready"):
+                return False
+            self._set("loading", "모델 로딩 중")
+            self._thread = threading.Thread(target=self._load, name="talkoo-model-loader", daemon=True)
+            self._thread.start()
+            return True
+
+    def wait(self, timeout: float | None = None) -> bool:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.state == "ready"
+
+    def wait_reload(self, timeout: float | None = None) -> bool:
+        thread = self._reload_thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.reload_state == "done"
+
+    def acquire(self, text_length: int = 0, quality: str | None = None) -> LoadedModel | None:
+        # 요청에 쓸 모델을 골라 사용을 시작. 끝나면 반드시 release
+        with self._cond:
+            if self.state != "ready" or not self.pool:
+                return None
+            loaded = route(self.pool, text_length, quality)
+            loaded.in_flight += 1
+            return loaded
+
+    def release(self, loaded: LoadedModel):
+        with self._cond:
+            loaded.in_flight -= 1
+            self._cond.notify_all()
+            retire = loaded.retired and loaded.in_flight == 0
+            if retire:
+                self._previous = [member for member in self._previous if member is not loaded]
+        if retire:
+            _retire([loaded])
+            info(f"남아 있던 기존 모델 요청 종료, 메모리 해제 : {MODEL_NAMES.get(loaded.model_type, '')}")
+
+    def _set(self, state: str, detail: str = ""):
+        self.state = state
+        self.detail = detail
+
+    def _set_reload(self, state: str, detail: str = ""):
+        self.reload_state = state
+        self.reload_detail = detail
+
+    def _build(self, set_state, warm: bool = True) -> tuple[LoadedModel, list[LoadedModel]]:
+        # 풀에 들어갈 모델을 모두 불러와 워밍업까지 마친다. 기본 모델이 실패하면 예외, 추가 모델은 건너뜀
+        budget = config.model_pool_memory_mb
+        used = 0.0
+        pool = []
+        start = time.perf_counter()
+        for model_type in _pool_types():
+            if pool and budget > 0 and used + _estimate_mb(model_type) > budget:
+                info(f"메모리 예산({budget}MB) 초과로 모델 풀에서 제외 : {MODEL_NAMES[model_type]} (예상 {_estimate_mb(model_type):.0f}MB, 사용 중 {used:.0f}MB)")
+                continue
+            set_state("loading", f"모델 로딩 중 : {MODEL_NAMES[model_type]}")
+            try:
+                talkoo = Talkoo(model_type)
+            except SystemExit as e:
+                # Talkoo()는 로드 실패 시 exit()를 부르므로 예외로 바꿔서 호출한 쪽이 상태를 정리하게 한다
+                if not pool:
+                    raise RuntimeError("모델 로드 실패") from e
+                error(f"모델 풀 추가 모델 로드 실패 : {MODEL_NAMES[model_type]}", e, ErrorCode.BASE_MODEL_LOAD_FAIL)
+                continue
+            loaded = LoadedModel(talkoo.tokenizer, talkoo.base_model, talkoo.actual_device, model_type)
+            loaded.memory_mb = _model_mb(loaded.base_model, model_type)
+            used += loaded.memory_mb
+            pool.append(loaded)
+            info(f"모델 풀 추가 : {loaded.name} ({loaded.memory_mb}MB, {model_identity(loaded.base_model)})")
+        self.load_seconds = round(time.perf_counter() - start, 2)
+
+        if warm:
+            self._warmup(pool, set_state)
+        return pool[0], sorted(pool, key=lambda loaded: loaded.model_type)
+
+    def _warmup(self, pool: list[LoadedModel], set_state):
+        set_state("warming", "워밍업 번역 중")
+        start = time.perf_counter()
+        for loaded in pool:
+            warmup(loaded)
+        self.warmup_seconds = round(time.perf_counter() - start, 2)
+
+    def _serve(self, primary: LoadedModel, pool: list[LoadedModel], signature: tuple):
+        if config.micro_batch:
+            for loaded in pool:
+                start_scheduler(loaded.tokenizer, loaded.base_model, loaded.device)
+        with self._cond:
+            self.loaded, self.pool, self.signature = primary, pool, signature
+            self._set("ready")
+        info(f"모델 준비 완료 (로드 {self.load_seconds}s, 워밍업 {self.warmup_seconds}s)")
+
+    def _load(self):
+        signature = _model_signature()
+        try:
+            primary, pool = self._build(self._set)
+        except Exception as e:
+            error("백그라운드 모델 로드 실패", e, ErrorCode.BASE_MODEL_LOAD_FAIL)
+            self._set("failed", "모델 로드 실패")
+            return
+        self._serve(primary, pool, signature)
+
+    def preload(self):
+        # 멀티 워커 모드: fork 전에 부모 프로세스에서 가중치만 올려둔다 (모델을 돌리지는 않음)
+        # 워밍업/스케줄러는 fork 된 워커마다 activate에서 따로 한다
+        signature = _model_signature()
+        self._set("loading", "모델 로딩 중")
+        primary, pool = self._build(self._set, warm=False)
+        self._preloaded = (primary, pool, signature)
+        self._set("loaded", "워커 시작 대기")
+
+    def activate(self):
+        # fork 된 워커에서 부모가 올려둔 모델로 워밍업 후 서비스 시작
+        primary, pool, signature = self._preloaded
+        self._preloaded = None
+        self._thread = threading.Thread(target=self._activate, args=(primary, pool, signature), name="talkoo-model-warmup", daemon=True)
+        self._thread.start()
+
+    def _activate(self, primary: LoadedModel, pool: list[LoadedModel], signature: tuple):
+        try:
+            self._warmup(pool, self._set)
+        except Exception as e:
+            error("워밍업 번역 실패", e, ErrorCode.MODEL_TRANSLATION)
+            self._set("failed", "워밍업 실패")
+            return
+        self._serve(primary, pool, signature)
+
+    def reload(self, force: bool = False) -> str:
+        # 기존 모델로 계속 번역하면서 새 모델을 백그라운드에서 불러와 교체한다
+        with self._cond:
+            if self.state in ("loading", "loaded", "warming"):
+                return "loading"
+            if self.state != "ready":
+                # 처음 로드가 실패했거나 아직 시작 전이면 교체할 모델이 없으니 그냥 로드
+                self.start()
+                return "loading"
+            if self.reload_state in ("loading", "warming", "draining", "releasing"):
+                return "in_progress"
+            if not force and self.signature == _model_signature():
+                return "unchanged"
+
+            self.reload_started = time.time()
+            self.reload_finished = None
+            self._set_reload("loading", "새 모델 로딩 중")
+            self._reload_thread = threading.Thread(target=self._reload, name="talkoo-model-reload", daemon=True)
+            self._reload_thread.start()
+            return "started"
+
+    def _reload(self):
+        signature = _model_signature()
+        try:
+            primary, pool = self._build(self._set_reload)
+        except Exception as e:
+            # 기존 모델은 그대로 계속 쓴다
+            error("모델 교체 실패, 기존 모델을 계속 사용합니다.", e, ErrorCode.BASE_MODEL_LOAD_FAIL)
+            self._set_reload("failed", "새 모델 로드 실패")
+            self.reload_finished = time.time()
+            return
+
+        # 스케줄러는 모델 객체별로 따로 돌므로 교체 전에 먼저 띄워둔다 (교체 직후 요청부터 마이크로 배치 사용)
+        if config.micro_batch:
+            for loaded in pool:
+                start_scheduler(loaded.tokenizer, loaded.base_model, loaded.device)
+
+        # 여기서부터 새 요청은 새 모델로 간다
+        with self._cond:
+            previous = self.pool
+            self.loaded, self.pool, self.signature = primary, pool, signature
+            self._previous = previous
+        info(f"모델 교체 완료 (로드 {self.load_seconds}s, 워밍업 {self.warmup_seconds}s), 기존 모델 요청 정리 중")
+
+        # 기존 모델로 처리 중인 요청이 끝날 때까지 기다린다 (그동안 기존 스케줄러도 유지)
+        self._set_reload("draining", "기존 모델 요청 처리 대기 중")
+        with self._cond:
+            drained = self._cond.wait_for(lambda: all(loaded.in_flight == 0 for loaded in previous), timeout=config.model_drain_timeout)
+            # 요청이 남은 모델은 지금 비우면 처리 중인 요청이 깨지므로 마지막 release에서 비우도록 표시만 한다
+            idle = [loaded for loaded in previous if loaded.in_flight == 0]
+            busy = [loaded for loaded in previous if loaded.in_flight > 0]
+            for loaded in busy:
+                loaded.retired = True
+            self._previous = busy
+        if not drained:
+            remaining = sum(loaded.in_flight for loaded in busy)
+            error(f"기존 모델 요청이 {config.model_drain_timeout}초 안에 끝나지 않았습니다. 남은 요청 {remaining}개가 끝나면 해제합니다.", None, ErrorCode.MODEL_TRANSLATION)
+
+        self._set_reload("releasing", "기존 모델 메모리 해제 중")
+        _retire(idle)
+        self._set_reload("done")
+        self.reload_finished = time.time()
+        info("기존 모델 메모리 해제 완료")
+
+    def status(self) -> dict:
+        loaded = self.loaded
+        return {
+            "status": self.state,
+            "detail": self.detail,
+            "model": loaded.name if loaded is not None else None,
+            "device": str(loaded.device) if loaded is not None else None,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "pool": [
+                {
+                    "model": member.name,
+                    "device": str(member.device),
+                    "memory_mb": member.memory_mb,
+                    "in_flight": member.in_flight,
+                    "queue_depth": _queue_depth(member),
+                }
+                for member in self.pool
+            ],
+        }
+
+    def reload_status(self) -> dict:
+        finished = self.reload_finished or time.time()
+        previous = self._previous
+        return {
+            "status": self.reload_state,
+            "detail": self.reload_detail,
+            "elapsed_seconds": round(finished - self.reload_started, 2) if self.reload_started else None,
+            "draining": sum(loaded.in_flight for loaded in previous),
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+        }
+
+
+def _retire(pool: list[LoadedModel]):
+    # 더 이상 요청이 없는 기존 모델의 스케줄러를 멈추고 메모리를 돌려준다
+    for loaded in pool:
+        stop_scheduler(loaded.base_model)
+    _free(pool)
+
+
+def _free(pool: list[LoadedModel]):
+    # 참조를 끊고 가비지 컬렉션 후 GPU 캐시까지 비워야 실제로 메모리가 돌아온다
+    for loaded in pool:
+        loaded.tokenizer = None
+        loaded.base_model = None
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def warmup(loaded: LoadedModel):
+    # 첫 요청이 메모리 할당/커널 선택 비용을 떠안지 않도록 캐시를 거치지 않고 모델을 직접 몇 번 돌린다
+    if not config.warmup:
+        return
+    texts = config.warmup_texts or DEFAULT_WARMUP_TEXTS
+    for text in texts:
+        generation.run_generate([text], loaded.tokenizer, loaded.base_model, loaded.device)
+    if len(texts) > 1:
+        # 패딩이 들어가는 배치 모양도 한번 거친다
+        generation.run_generate(texts, loaded.tokenizer, loaded.base_model, loaded.device)
+    info(f"워밍업 완료 : {loaded.name}, 문장 {len(texts)}개")
+
+
+_manager = ModelManager()
+
+
+def start_loading() -> bool:
+    return _manager.start()
+
+
+def reload(force: bool = False) -> str:
+    return _manager.reload(force)
+
+
+def acquire(text_length: int = 0, quality: str | None = None) -> LoadedModel | None:
+    return _manager.acquire(text_length, quality)
+
+
+def release(loaded: LoadedModel):
+    _manager.release(loaded)
+
+
+def status() -> dict:
+    return _manager.status()
+
+
+def reload_status() -> dict:
+    return _manager.reload_status()
+
+
+def preload():
+    _manager.preload()
+
+
+def activate():
+    _manager.activate()
+
+
+def get_manager() -> ModelManager:
+    return _manager
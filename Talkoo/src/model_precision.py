@@ -0,0 +1,46 @@
+import torch
+from utils.logger import error, info
+from utils.error_codes import ErrorCode
+
+# fp32 = 기본, bf16 = 가중치/연산을 bfloat16으로, int8 = Linear 레이어 동적 양자화(CPU 전용)
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def normalize_precision(precision: str | None) -> str:
+    value = (precision or "fp32").lower()
+    if value not in PRECISIONS:
+        error(f"모델 정밀도 입력 값 오류({precision}), fp32로 초기화.", None, ErrorCode.MODEL_INPUT)
+        return "fp32"
+    return value
+
+
+def load_kwargs(precision: str) -> dict:
+    # bf16은 처음부터 bfloat16으로 읽어서 fp32 사본만큼 메모리가 더 잡히지 않게 한다
+    if normalize_precision(precision) == "bf16":
+        return {"torch_dtype": torch.bfloat16}
+    return {}
+
+
+def detect_precision(model) -> str:
+    # 설정값이 아니라 실제로 로드된 가중치 기준 (int8을 GPU에서 요청하면 fp32로 남는 경우 등)
+    if any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in model.modules()):
+        return "int8"
+    dtype = next(model.parameters()).dtype
+    if dtype == torch.bfloat16:
+        return "bf16"
+    return "fp32" if dtype == torch.float32 else str(dtype).replace("torch.", "")
+
+
+def apply_precision(model, precision: str):
+    precision = normalize_precision(precision)
+    if precision == "bf16":
+        if next(model.parameters()).dtype != torch.bfloat16:
+            model = model.to(torch.bfloat16)
+    elif precision == "int8":
+        if next(model.parameters()).device.type != "cpu":
+            error("int8 동적 양자화는 CPU에서만 지원됩니다. fp32로 실행합니다.", None, ErrorCode.MODEL_INPUT)
+            return model
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.eval()
+    info(f"모델 정밀도 : {precision}")
+    return model
@@ -75,7 +75,7 @@ const handleSubmit = async (event) => {
   let invalidResult = false;
   
   try {
-    const response = await fetch('/translate/', {
+    const response = await fetch('/translate/stream/', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -85,37 +85,76 @@ const handleSubmit = async (event) => {
       })
     });
 
-    if (response.ok) {
-      const data = await response.json();
-      
+    if (response.ok && response.body) {
       // 유효성 검사 함수
       const isValidResult = (result) => {
         return result && result.trim() !== '' && result !== '번역 결과가 없습니다.';
       };
-      
-      // 모든 번역 결과 저장 (유효성 포함)
+      const toResult = (value) => ({
+        text: value || '번역 결과가 없습니다.',
+        isValid: isValidResult(value)
+      });
+
+      // 단계별 결과가 도착하는 대로 화면에 반영, 아직 안 끝난 단계는 '번역 중...'
       translationResults = {
-        modelTrans: {
-          text: data.modelTrans || '번역 결과가 없습니다.',
-          isValid: isValidResult(data.modelTrans)
-        },
-        prePostTrans: {
-          text: data.prePostTrans || '번역 결과가 없습니다.',
-          isValid: isValidResult(data.prePostTrans)
-        },
-        geminiIntegra: {
-          text: data.geminiIntegra || '번역 결과가 없습니다.',
-          isValid: isValidResult(data.geminiIntegra)
+        modelTrans: { text: '번역 중...', isValid: false },
+        prePostTrans: { text: '번역 중...', isValid: false },
+        geminiIntegra: { text: '번역 중...', isValid: false }
+      };
+      geminiReson = '번역 중...';
+      let modelText = '';
+      let status = null;
+
+      const handleEvent = (event, data) => {
+        if (event === 'modelTrans') {
+          if (data.delta !== undefined) {
+            modelText += data.delta;
+            translationResults.modelTrans = { text: modelText, isValid: true };
+          } else {
+            translationResults.modelTrans = toResult(data.text);
+          }
+        } else if (event === 'prePostTrans') {
+          translationResults.prePostTrans = toResult(data.text);
+        } else if (event === 'gemini') {
+          translationResults.geminiIntegra = toResult(data.geminiIntegra);
+          geminiReson = data.geminiReson || '번역 결과가 없습니다.';
+        } else if (event === 'done') {
+          status = data.status;
         }
+        updateTranslationDisplay();
       };
 
-      geminiReson = data.geminiReson || '번역 결과가 없습니다.';
-      
-      // 현재 선택된 모드에 따라 결과 표시
-      updateTranslationDisplay();
-      invalidResult = false;
+      // SSE 형식(event: ..., data: ..., 빈 줄로 구분)을 직접 파싱
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          let event = 'message';
+          let data = '';
+          block.split('\n').forEach(line => {
+            if (line.startsWith('event: ')) event = line.slice(7);
+            else if (line.startsWith('data: ')) data += line.slice(6);
+          });
+          if (data) handleEvent(event, JSON.parse(data));
+        }
+      }
+
+      invalidResult = status !== 'success';
+      if (invalidResult) {
+        resultTextElement.textContent = '번역 중 오류가 발생했습니다.';
+      }
     } else {
-      resultTextElement.textContent = '번역 중 오류가 발생했습니다.';
+      // 503 = 서버는 떠 있지만 모델을 아직 불러오는 중
+      resultTextElement.textContent = response.status === 503
+        ? '모델을 불러오는 중입니다. 잠시 후 다시 시도해 주세요.'
+        : '번역 중 오류가 발생했습니다.';
       invalidResult = true;
     }
   } catch (error) {
@@ -185,6 +224,17 @@ settingManager.defineSettings('general', [
     ],
     desc: 'CPU와 GPU를 동시에 사용하여 부담을 줄입니다. 단, 로딩이 좀 느려질 수 있습니다.'
   },
+  {
+    id: 'model_precision',
+    label: '모델 정밀도',
+    type: 'select',
+    options: [
+      { value: 'fp32', label: 'FP32' },
+      { value: 'bf16', label: 'BF16' },
+      { value: 'int8', label: 'INT8 (CPU)' }
+    ],
+    desc: '낮을수록 메모리를 적게 쓰고 CPU에서 빨라지지만 번역 결과가 조금 달라질 수 있습니다.'
+  },
   {
     id: 'debug_mod',
     label: '디버그 모드',
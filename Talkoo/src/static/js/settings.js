@@ -1,5 +1,9 @@
 // ===== 설정 관리 모듈 =====
 
+// 모델 교체 진행 상황 확인 주기와 최대 횟수 (로드 시간 + 기존 모델 드레인 대기 고려, 약 5분)
+const RELOAD_POLL_INTERVAL_MS = 1000;
+const RELOAD_POLL_MAX_ATTEMPTS = 300;
+
 class SettingManager {
   constructor() {
     this.settings = {};
@@ -81,7 +85,25 @@ class SettingManager {
   }
 
   async reloadModelOnly() {
-    try { await fetch('/setting/reload/model/', { method: 'POST' }); } catch {}
+    // 서버는 기존 모델로 계속 번역하면서 새 모델로 교체하므로 끝날 때까지 진행 상황을 확인
+    try {
+      const res = await fetch('/setting/reload/model/', { method: 'POST' });
+      const { status } = await res.json();
+      if (status !== 'model_reload_started' && status !== 'model_reload_in_progress') return;
+      // 네트워크 오류나 워커 재시작으로 상태가 끝나지 않으면 무한 대기하지 않도록 제한
+      for (let attempt = 0; attempt < RELOAD_POLL_MAX_ATTEMPTS; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, RELOAD_POLL_INTERVAL_MS));
+        const poll = await fetch('/setting/reload/model/');
+        if (!poll.ok) throw new Error(`상태 확인 실패 (HTTP ${poll.status})`);
+        const progress = await poll.json();
+        if (progress.status === 'done') return;
+        if (progress.status === 'failed') throw new Error(progress.detail);
+      }
+      console.error('모델 교체 확인 시간 초과');
+      alert('모델 교체 완료를 확인하지 못했습니다. 잠시 후 새로고침해 주세요.');
+    } catch (err) {
+      console.error('모델 교체 실패:', err);
+    }
   }
 
   defineSettings(type, settings) {
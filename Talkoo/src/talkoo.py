@@ -4,21 +4,32 @@ import config
 from utils.logger import error, debug, info
 from utils.error_codes import ErrorCode
 from translation_manager import trans_start
+from model_precision import apply_precision, load_kwargs
+from translator.backends import create_backend
+
+MODEL_NAMES = {
+    1: "facebook/nllb-200-distilled-600M",
+    2: "facebook/nllb-200-1.3B",
+    3: "facebook/nllb-200-3.3B",
+}
 
 class Talkoo:
-    def __init__(self):
+    def __init__(self, model_type: int | None = None):
+        # model_type을 넘기지 않으면 MODEL_TYPE 설정값 (모델 풀은 여러 크기를 따로 불러온다)
+        if model_type is None:
+            model_type = config.model_type
         try:
-            if config.model_type == 3:
-                model_name = "facebook/nllb-200-3.3B"
+            if model_type == 3:
+                model_name = MODEL_NAMES[3]
                 info("모델 설정 : nllb-200-3.3B.")
-            elif config.model_type == 2:
-                model_name = "facebook/nllb-200-1.3B"
+            elif model_type == 2:
+                model_name = MODEL_NAMES[2]
                 info("모델 설정 : nllb-200-1.3B.")
-            elif config.model_type == 1:
-                model_name = "facebook/nllb-200-distilled-600M"
+            elif model_type == 1:
+                model_name = MODEL_NAMES[1]
                 info("모델 설정 : nllb-200-600M.")
             else:
-                model_name = "facebook/nllb-200-distilled-600M"
+                model_name = MODEL_NAMES[1]
                 error("모델 입력 값 오류, 모델 nllb-200-600M으로 초기화.", None, ErrorCode.MODEL_INPUT)
         except Exception as e:
             error("예상을 벗어난 오류 발생, 확인 요함.", e, ErrorCode.UNKNOWN)
@@ -31,7 +42,15 @@ class Talkoo:
             error("토크나이저 로드 실패. 모델 이름 또는 네트워크 연결 확인 필요.", e, ErrorCode.TOKENIZER_LOAD_FAIL)
             exit()
 
-        if config.device_map == 0:
+        # INFERENCE_BACKEND가 torch가 아니면 그 백엔드를 base_model 자리에 둔다 (로드 실패 시 torch로 진행)
+        self.base_model = None
+        if config.inference_backend != "torch":
+            self.actual_device = "cuda" if config.model_device == 0 and torch.cuda.is_available() else "cpu"
+            self.base_model = create_backend(self.tokenizer, model_name, self.actual_device)
+
+        if self.base_model is not None:
+            info(f"추론 백엔드 설정 : {self.base_model.name}")
+        elif config.device_map == 0:
             if config.model_device == 0 and torch.cuda.is_available():
                 self.actual_device = "cuda"
                 info("GPU 장치 설정 완료!")
@@ -41,18 +60,20 @@ class Talkoo:
                 info("CPU 장치 설정 완료!")
             
             try:
-                self.base_model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+                self.base_model = AutoModelForSeq2SeqLM.from_pretrained(model_name, **load_kwargs(config.model_precision))
                 info("베이스 모델 로드 완료.")
                 self.base_model.to(self.actual_device)
                 info(f"모델의 위치를 설정된 위치({self.actual_device})로 옮겼습니다.")
+                self.base_model = apply_precision(self.base_model, config.model_precision)
             except Exception as e:
                 error("베이스 모델 로드 또는 이동 실패.", e, ErrorCode.BASE_MODEL_LOAD_FAIL)
                 exit()
 
         elif config.device_map == 1:
             try:
-                self.base_model = AutoModelForSeq2SeqLM.from_pretrained(model_name, device_map=config.device_map)
+                self.base_model = AutoModelForSeq2SeqLM.from_pretrained(model_name, device_map=config.device_map, **load_kwargs(config.model_precision))
                 info("베이스 모델을 device_map=Auto로 로드 완료.")
+                self.base_model = apply_precision(self.base_model, config.model_precision)
                 self.actual_device = self.base_model.device
             except Exception as e:
                 error("Auto device_map 모델 로드 실패.", e, ErrorCode.AUTO_DEVICE_MAP_FAIL)
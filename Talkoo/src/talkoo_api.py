@@ -1,22 +1,109 @@
+import contextlib
+import hmac
+import json
 import pathlib
+import time
 import config
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from talkoo import Talkoo
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import model_manager
+import config_sync
+from model_precision import normalize_precision
 from customDICT.dict_main import get_tkdic_list, select_tkdic
-from customDICT.tkdic_paser import parse_tkdic
+from customDICT.dict_registry import get_dictionary, invalidate as invalidate_dictionary
 from pydantic import BaseModel, Field
 from typing import Any
 
-from translation_manager import trans_start
+from translation_manager import trans_start, trans_start_deferred, trans_stream, trans_batch
+import translation_cache
+from translator import gemini_cache, gemini_jobs, languages, translation_memory
+from utils import metrics, profiling
 
 app = FastAPI()
 STATIC_DIR = pathlib.Path(__file__).parent / "static"
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
+
+@app.middleware("http")
+async def sync_shared_settings(request: Request, call_next):
+    # 멀티 워커 모드에서 다른 워커가 바꾼 설정을 요청 처리 전에 반영
+    config_sync.sync()
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    # 나중에 등록한 미들웨어가 바깥에서 돌므로 설정 동기화까지 포함한 시간을 잰다
+    metrics.IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.IN_FLIGHT.dec()
+        # 라벨은 경로 템플릿(/translate/jobs/{job_id})으로 묶어 값 종류가 늘어나지 않게 한다
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "other")
+        metrics.REQUESTS.inc(1, (endpoint, request.method, str(status)))
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, (endpoint,))
+
+
+def _acquire_model(text_length: int = 0, quality: str | None = None) -> model_manager.LoadedModel:
+    # 모델 풀에서 입력 길이/힌트/대기열로 모델을 고른다. 다 쓰면 model_manager.release
+    # 모델이 아직 준비되지 않았으면 번역 요청은 503으로 돌려보낸다
+    loaded = model_manager.acquire(text_length, quality if quality in model_manager.QUALITY_HINTS else None)
+    if loaded is None:
+        raise HTTPException(status_code=503, detail="모델을 불러오는 중입니다.", headers={"Retry-After": "5"})
+    return loaded
+
+
+def _request_langs(tokenizer, src_lang: str | None, tgt_lang: str | None) -> tuple[str, str]:
+    # 요청이 지정한 언어쌍 (빠진 쪽은 설정값), tokenizer에 없는 언어 코드면 400
+    langs = languages.lang_pair(src_lang, tgt_lang)
+    problem = languages.check_pair(tokenizer, langs)
+    if problem is not None:
+        raise HTTPException(status_code=400, detail=problem)
+    return langs
+
+def _flag(value: str | None) -> bool:
+    return value is not None and value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _profile_kind(http_request: Request, profile: str | None) -> str | None:
+    # ?profile= 또는 X-Talkoo-Profile 헤더 (torch | cprofile), 관리자 토큰(X-Talkoo-Admin-Token)이 맞아야 한다
+    kind = profile or http_request.headers.get("X-Talkoo-Profile")
+    if not kind:
+        return None
+    token = http_request.headers.get("X-Talkoo-Admin-Token", "")
+    if not config.admin_token or not hmac.compare_digest(token.encode(), config.admin_token.encode()):
+        raise HTTPException(status_code=403, detail="프로파일은 관리자만 사용할 수 있습니다.")
+    kind = kind.strip().lower()
+    if kind not in profiling.PROFILERS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 프로파일러: {kind} (가능: {', '.join(profiling.PROFILERS)})")
+    return kind
+
+
+def _timing_report(stage_seconds: dict, total_seconds: float) -> dict[str, float]:
+    # 단계별 소요 시간(ms). 마이크로 배치로 묶인 단계는 배치 전체 시간, total = 요청 처리 전체 시간
+    report = metrics.timings_ms(stage_seconds)
+    report["total"] = round(total_seconds * 1000, 1)
+    return report
+
+
 class TranslationRequest(BaseModel):
     text: str = Field(..., example="(기본문장) I want to kill two birds with one stone.")
+    # True면 Gemini 결과를 기다리지 않고 job_id로 나중에 조회 (None = GEMINI_ASYNC 설정값)
+    async_gemini: bool | None = None
+    # 모델 풀 라우팅 힌트: latency = 가장 빠른 모델, quality = 가장 큰 모델, None = 입력 길이/대기열로 자동
+    quality: str | None = None
+    # NLLB 언어 코드 (eng_Latn, kor_Hang, jpn_Jpan ...), None = 설정값(SRC_LANG/TGT_LANG)
+    # 기본 언어쌍이 아니면 사용자 사전/Gemini 다듬기 없이 모델 번역만 한다
+    src_lang: str | None = None
+    tgt_lang: str | None = None
 
 class TranslationResponse(BaseModel):
     status: str
@@ -24,28 +111,215 @@ class TranslationResponse(BaseModel):
     prePostTrans: str
     geminiReson: str
     geminiIntegra: str
+    job_id: str | None = None
+    # ?timings=true (또는 X-Talkoo-Timings: 1) 일 때만 채운다 {단계: ms}
+    timings: dict[str, float] | None = None
+    # 관리자 프로파일을 요청했을 때 log/profiles 아래에 저장된 파일 이름
+    profile: str | None = None
 
 @app.post("/translate/", response_model=TranslationResponse)
-def run_api_translation(translation_data: TranslationRequest, http_request: Request):
-    
-    tokenizer = http_request.app.state.tokenizer
-    base_model = http_request.app.state.base_model
-    actual_device = http_request.app.state.device
-    
+def run_api_translation(translation_data: TranslationRequest, http_request: Request, http_response: Response,
+                        timings: bool = False, profile: str | None = None):
+    # timings: 응답에 단계별 소요 시간(tkdic/tokenize/generate/gemini ...)을 붙인다 (Server-Timing 헤더도 같이)
+    # profile: 이 요청을 torch.profiler / cProfile로 잡아 log/profiles 아래에 저장 (관리자 전용)
+    profile_kind = _profile_kind(http_request, profile)
+    # 프로파일한 요청은 단계 시간도 같이 돌려준다 (파일과 나란히 보기 위해)
+    want_timings = timings or _flag(http_request.headers.get("X-Talkoo-Timings")) or profile_kind is not None
+
+    loaded = _acquire_model(len(translation_data.text), translation_data.quality)
+    tokenizer, base_model, actual_device = loaded.tokenizer, loaded.base_model, loaded.device
+    http_response.headers["X-Talkoo-Model"] = loaded.name
+
     try:
         original_text = translation_data.text
-        nomal_text, per_text, refined_reson, refined_trans_text = trans_start(original_text, tokenizer, base_model, actual_device)
-
-        return TranslationResponse(status="success", modelTrans=nomal_text, prePostTrans=per_text, geminiReson=refined_reson, geminiIntegra=refined_trans_text)
+        langs = _request_langs(tokenizer, translation_data.src_lang, translation_data.tgt_lang)
+        async_gemini = config.gemini_async if translation_data.async_gemini is None else translation_data.async_gemini
+        capture = profiling.capture(profile_kind) if profile_kind else contextlib.nullcontext()
+        job_id = None
+        start = time.perf_counter()
+        with metrics.request_timings() as stage_seconds, capture as profile_path:
+            if async_gemini and config.gemini_integration:
+                nomal_text, per_text, refined_reson, refined_trans_text, job_id = trans_start_deferred(original_text, tokenizer, base_model, actual_device, langs)
+            else:
+                nomal_text, per_text, refined_reson, refined_trans_text = trans_start(original_text, tokenizer, base_model, actual_device, langs)
+            # 프로파일 파일 저장 시간은 빼고 잰다
+            total_seconds = time.perf_counter() - start
+
+        report = None
+        if want_timings:
+            report = _timing_report(stage_seconds, total_seconds)
+            http_response.headers["Server-Timing"] = ", ".join(f"{stage};dur={ms}" for stage, ms in report.items())
+
+        return TranslationResponse(status="success", modelTrans=nomal_text, prePostTrans=per_text, geminiReson=refined_reson, geminiIntegra=refined_trans_text,
+                                   job_id=job_id, timings=report, profile=pathlib.Path(profile_path).name if profile_path else None)
 
+    except HTTPException:
+        raise
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        model_manager.release(loaded)
+
+class GeminiJobResponse(BaseModel):
+    job_id: str
+    status: str
+    geminiReson: str
+    geminiIntegra: str
+
+@app.get("/translate/jobs/{job_id}", response_model=GeminiJobResponse)
+def get_gemini_job(job_id: str, wait: float = 0):
+    # wait > 0 이면 결과가 나올 때까지 최대 wait초(최대 30초) 기다렸다가 응답 (롱 폴링)
+    job = gemini_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    if wait > 0 and job.status == "pending":
+        job.wait(min(wait, 30.0))
+    return GeminiJobResponse(job_id=job.job_id, status=job.status, geminiReson=job.refined_reson, geminiIntegra=job.refined_trans_text)
+
+@app.post("/translate/stream/")
+def run_api_translation_stream(translation_data: TranslationRequest, http_request: Request):
+    # SSE: event 이름은 modelTrans / prePostTrans / gemini / done, data는 JSON
+    # 스트리밍은 마이크로 배치 스케줄러를 쓰지 않는다: 토큰을 바로 내보내야 해서 요청마다 따로 generate 한다
+    # (BATCH_TRANS여도 기본 번역과 사전 번역을 한 generate로 묶지 않음, 대신 치환이 없으면 기본 번역을 재사용)
+    loaded = _acquire_model(len(translation_data.text), translation_data.quality)
+    try:
+        langs = _request_langs(loaded.tokenizer, translation_data.src_lang, translation_data.tgt_lang)
+    except HTTPException:
+        model_manager.release(loaded)
+        raise
+
+    def events():
+        try:
+            for event, payload in trans_stream(translation_data.text, loaded.tokenizer, loaded.base_model, loaded.device, langs):
+                yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        finally:
+            model_manager.release(loaded)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Talkoo-Model": loaded.name})
+
+
+def _batch_item(raw) -> tuple[Any, str | None, tuple, str | None]:
+    # 배열/JSONL 항목은 문자열 또는 {"text": ..., "id": ..., "src_lang": ..., "tgt_lang": ...} 형태
+    # 반환: (id, text, 항목이 지정한 (src_lang, tgt_lang), 오류 메시지)
+    if isinstance(raw, str):
+        return None, raw, (None, None), None
+    if isinstance(raw, dict) and isinstance(raw.get("text"), str):
+        return raw.get("id"), raw["text"], (raw.get("src_lang"), raw.get("tgt_lang")), None
+    return raw.get("id") if isinstance(raw, dict) else None, None, (None, None), "text 항목이 없습니다."
+
+
+async def _jsonl_items(http_request: Request):
+    # 요청 본문을 다 받기 전에도 줄 단위로 바로 처리
+    buffer = b""
+    async for chunk in http_request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def _batch_items(http_request: Request):
+    content_type = http_request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        async for line in _jsonl_items(http_request):
+            try:
+                yield _batch_item(json.loads(line))
+            except json.JSONDecodeError as e:
+                yield None, None, (None, None), f"JSON 형식 오류: {e}"
+        return
+
+    try:
+        body = await http_request.json()
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"JSON 형식 오류: {e}")
+    if isinstance(body, dict):
+        body = body.get("texts")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="번역할 문장 배열이 필요합니다.")
+    for raw in body:
+        yield _batch_item(raw)
+
+
+@app.post("/translate/batch/")
+@app.post("/translate/batch", include_in_schema=False)
+async def run_api_translation_batch(http_request: Request, quality: str | None = None,
+                                    src_lang: str | None = None, tgt_lang: str | None = None):
+    # 결과는 입력 순서대로 한 줄에 하나씩 NDJSON으로 내려준다
+    # 모델 풀을 쓰면 요청 전체가 한 모델로 처리된다 (?quality= 힌트, 없으면 첫 항목 길이로 선택)
+    # ?src_lang=&tgt_lang= 은 항목에 언어가 없을 때의 기본값, 언어쌍이 다른 항목은 언어쌍별로 묶어서 번역
+    items = _batch_items(http_request)
+    # 배열 본문 형식 오류는 스트리밍 시작 전에 400으로 돌려준다
+    first = await anext(items, None)
+    loaded = _acquire_model(len(first[1] or "") if first is not None else 0, quality)
+    # 스트리밍 중에 모델이 교체돼도 처음 받은 모델로 끝까지 번역한다 (release 전까지는 해제되지 않음)
+    tokenizer, base_model, actual_device = loaded.tokenizer, loaded.base_model, loaded.device
+    try:
+        _request_langs(tokenizer, src_lang, tgt_lang)
+    except HTTPException:
+        model_manager.release(loaded)
+        raise
+
+    def result_line(index: int, item_id, result) -> str:
+        line = {"index": index}
+        if item_id is not None:
+            line["id"] = item_id
+        if isinstance(result, str):
+            line.update(status="error", detail=result)
+        elif isinstance(result, Exception):
+            line.update(status="error", detail=str(result))
+        else:
+            nomal_text, per_text, refined_reson, refined_trans_text = result
+            failed = nomal_text in translation_cache.ERROR_TEXTS or per_text in translation_cache.ERROR_TEXTS
+            line.update(status="error" if failed else "success", modelTrans=nomal_text, prePostTrans=per_text,
+                        geminiReson=refined_reson, geminiIntegra=refined_trans_text)
+        return json.dumps(line, ensure_ascii=False) + "\n"
+
+    async def translate_group(group: list, offset: int):
+        checked = []
+        for item_id, text, (item_src, item_tgt), problem in group:
+            langs = languages.lang_pair(item_src or src_lang, item_tgt or tgt_lang)
+            if problem is None:
+                problem = languages.check_pair(tokenizer, langs)
+            checked.append((item_id, text, langs, problem))
+        texts = [text for _, text, _, problem in checked if problem is None]
+        pairs = [langs for _, _, langs, problem in checked if problem is None]
+        translated = iter(await run_in_threadpool(trans_batch, texts, tokenizer, base_model, actual_device, pairs) if texts else [])
+        for position, (item_id, _, _, problem) in enumerate(checked):
+            yield result_line(offset + position, item_id, problem if problem is not None else next(translated))
+
+    async def results():
+        group = []
+        offset = 0
+        try:
+            if first is None:
+                return
+            group.append(first)
+            async for item in items:
+                group.append(item)
+                if len(group) >= max(1, config.batch_api_size):
+                    async for line in translate_group(group, offset):
+                        yield line
+                    offset += len(group)
+                    group = []
+            if group:
+                async for line in translate_group(group, offset):
+                    yield line
+        finally:
+            model_manager.release(loaded)
+
+    return StreamingResponse(results(), media_type="application/x-ndjson", headers={"X-Talkoo-Model": loaded.name})
 
 class SettingResponse(BaseModel):
     model_type: int
     model_device: int
     device_map: int
     debug_mod: bool
+    model_precision: str = "fp32"
 
 @app.post("/setting/", response_model=SettingResponse)
 def update_setting(request: SettingResponse):
@@ -53,12 +327,15 @@ def update_setting(request: SettingResponse):
     config.model_device = request.model_device
     config.device_map = request.device_map
     config.debug_mod = request.debug_mod
+    config.model_precision = normalize_precision(request.model_precision)
+    config_sync.publish()
 
     return SettingResponse(
         model_type=config.model_type,
         model_device=config.model_device,
         device_map=config.device_map,
-        debug_mod=config.debug_mod
+        debug_mod=config.debug_mod,
+        model_precision=config.model_precision
     )
 
 @app.get("/setting/", response_model=SettingResponse)
@@ -67,7 +344,8 @@ def get_setting():
         model_type=config.model_type,
         model_device=config.model_device,
         device_map=config.device_map,
-        debug_mod=config.debug_mod
+        debug_mod=config.debug_mod,
+        model_precision=config.model_precision
     )
     
 class TransSettingResponse(BaseModel):
@@ -87,6 +365,7 @@ def update_trans_settings(request: TransSettingResponse):
     config.gemini_integration = request.gemini_integration
     config.gemini_api = request.gemini_api
     # tkdic_* 값은 클라이언트에서 넘어와도 서버 기준을 유지
+    config_sync.publish()
 
     return TransSettingResponse(
         nomal_trans=config.nomal_trans,
@@ -118,6 +397,7 @@ class ReloadResponse(BaseModel):
 @app.post("/setting/reload/config/", response_model=ReloadResponse)
 def config_reload_settings():
     config.reload_config()
+    config_sync.publish(reload_env=True)
     return ReloadResponse(status="config_reloaded")
 
 
@@ -126,9 +406,28 @@ class ReloadResponse(BaseModel):
 
 
 @app.post("/setting/reload/model/", response_model=ReloadResponse)
-def model_reload_settings():
-    Talkoo()
-    return ReloadResponse(status="model_reloaded")
+def model_reload_settings(force: bool = False):
+    # 기존 모델로 계속 번역하면서 백그라운드에서 새 모델로 교체. 진행 상황은 GET으로 확인
+    # status: started / in_progress / unchanged(설정이 같아 건너뜀, force=true면 강제) / loading(첫 로드 중)
+    # 멀티 워커 모드에서는 다른 워커도 각자 교체한다
+    status = model_manager.reload(force)
+    config_sync.publish(reload_model=True, force=force)
+    return ReloadResponse(status=f"model_reload_{status}")
+
+
+class ModelReloadStatusResponse(BaseModel):
+    status: str
+    detail: str
+    elapsed_seconds: float | None = None
+    draining: int  # 아직 기존 모델로 처리 중인 요청 수
+    load_seconds: float | None = None
+    warmup_seconds: float | None = None
+
+
+@app.get("/setting/reload/model/", response_model=ModelReloadStatusResponse)
+def model_reload_status():
+    # status: idle / loading / warming / draining / releasing / done / failed
+    return ModelReloadStatusResponse(**model_manager.reload_status())
 
 
 class DictionaryListResponse(BaseModel):
@@ -151,6 +450,7 @@ def set_active_dictionary(request: SelectDictionaryRequest):
     if success:
         # 선택 성공 시 실제 사용되는 설정에도 반영
         config.tkdic_select = request.filename
+        config_sync.publish()
         return {"status": "success", "selected_dictionary": config.tkdic_select}
     else:
         raise HTTPException(
@@ -188,6 +488,7 @@ def upload_dictionary_json(request: UploadDictionaryJsonRequest):
 
         with open(dest, 'wb') as f:
             f.write(content_bytes)
+        invalidate_dictionary(str(dest))
 
         return UploadDictionaryResponse(status="success", filename=filename)
     except HTTPException:
@@ -208,10 +509,12 @@ def delete_dictionary(filename: str):
         if not file_path.exists():
             raise HTTPException(status_code=404, detail="사전을 찾을 수 없습니다.")
         file_path.unlink()
+        invalidate_dictionary(str(file_path))
 
         # 선택된 사전을 삭제했다면 선택 해제
         if config.tkdic_select == filename:
             config.tkdic_select = None
+            config_sync.publish()
 
         return DeleteDictionaryResponse(status="success", filename=filename)
     except HTTPException:
@@ -261,6 +564,7 @@ def add_dict_entry(request: DictEntryRequest):
         entry_block = "\n".join(lines) + "\n\n"
         with open(dest, 'a', encoding='utf-8') as f:
             f.write(entry_block)
+        invalidate_dictionary(str(dest))
 
         return DictEntryResponse(status="success", filename=filename)
     except HTTPException:
@@ -282,7 +586,8 @@ def get_dict_entries(filename: str):
         if not file_path.exists():
             raise HTTPException(status_code=404, detail="사전을 찾을 수 없습니다.")
 
-        main_fuzzy, results = parse_tkdic(str(file_path))
+        dictionary = get_dictionary(str(file_path))
+        main_fuzzy, results = dictionary.main_fuzzy, dictionary.entries
         # 표준화: 필요한 키만 유지
         normalized = []
         for it in results or []:
@@ -297,13 +602,62 @@ def get_dict_entries(filename: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class CacheStatsResponse(BaseModel):
+    memory_entries: int
+    disk_entries: int
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    hit_rate: float
+
+@app.get("/cache/", response_model=CacheStatsResponse)
+def get_cache_stats():
+    return CacheStatsResponse(**translation_cache.stats())
+
+@app.delete("/cache/", response_model=CacheStatsResponse)
+def invalidate_cache():
+    translation_cache.invalidate()
+    return CacheStatsResponse(**translation_cache.stats())
+
+@app.get("/cache/memory/", response_model=CacheStatsResponse)
+def get_translation_memory_stats():
+    return CacheStatsResponse(**translation_memory.stats())
+
+@app.delete("/cache/memory/", response_model=CacheStatsResponse)
+def invalidate_translation_memory():
+    translation_memory.invalidate()
+    return CacheStatsResponse(**translation_memory.stats())
+
+@app.get("/cache/gemini/", response_model=CacheStatsResponse)
+def get_gemini_cache_stats():
+    return CacheStatsResponse(**gemini_cache.stats())
+
+@app.delete("/cache/gemini/", response_model=CacheStatsResponse)
+def invalidate_gemini_cache():
+    gemini_cache.invalidate()
+    return CacheStatsResponse(**gemini_cache.stats())
+
+@app.get("/health")
+def health():
+    # 생존 여부만 확인 (모델 로딩 중에도 ok)
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    # 번역 가능 여부: loading / warming / ready / failed, 준비 전에는 503
+    status = model_manager.status()
+    return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    # Prometheus 수집용: 요청/단계별 지연 히스토그램, 토큰 수, 대기열, 모델/캐시 상태
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ***** frontend templates routing
 # SPA 형태로 만들 듯
 @app.get("/{full_path:path}")
 async def serve_spa(full_path: str):
     return FileResponse(f"{STATIC_DIR}/index.html")
-
-
-@app.get("/health")
-def health():
-    return {"status": "ok"}
\ No newline at end of file
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+import config
+from customDICT.dict_registry import get_dictionary
+from utils.cache_store import TwoTierCache
+
+# 실패 결과는 캐시하지 않는다
+ERROR_TEXTS = frozenset({
+    "[번역 오류 발생]",
+    "[번역 실패]",
+    "[API 키 오류]",
+    "[API 호출 실패]",
+    "[이유 분석 실패]",
+    "[Gemini 응답 없음]",
+    "[JSON 형식 오류]",
+})
+
+_cache: TwoTierCache | None = None
+
+
+def get_cache() -> TwoTierCache:
+    global _cache
+    if _cache is None:
+        _cache = TwoTierCache("translation_cache", config.cache_path, config.cache_memory_size, config.cache_disk_size)
+    return _cache
+
+
+def dictionary_hash(tk_path: str, tk_select: str | None) -> str:
+    if not tk_select:
+        return ""
+    try:
+        return get_dictionary(os.path.join(tk_path, tk_select)).content_hash
+    except OSError:
+        return ""
+
+
+def make_key(text: str, model_id: str, langs: tuple[str, str] | None = None) -> str:
+    # model_id = backends.model_identity(base_model): 이름/백엔드/정밀도를 결과를 만든 모델 기준으로
+    src_lang, tgt_lang = langs if langs is not None else (config.src_lang, config.tgt_lang)
+    payload = {
+        "text": text,
+        "src_lang": src_lang,
+        "tgt_lang": tgt_lang,
+        "model": model_id,
+        "nomal_trans": config.nomal_trans,
+        "per_post_trans": config.per_post_trans,
+        "gemini_integration": config.gemini_integration,
+        "dict": dictionary_hash(config.tkdic_path, config.tkdic_select) if config.per_post_trans else "",
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def lookup(key: str) -> tuple | None:
+    value = get_cache().get(key)
+    return tuple(value) if value is not None else None
+
+
+def store(key: str, result: tuple):
+    if any(text in ERROR_TEXTS for text in result):
+        return
+    get_cache().set(key, list(result))
+
+
+def invalidate():
+    get_cache().clear()
+
+
+def stats() -> dict:
+    return get_cache().stats()
@@ -1,33 +1,266 @@
+import time
 import config
+import translation_cache
 from translator.first_translation import first_translation
-from translator.second_translation import second_translation
-from translator.gemini_integration import refine_with_gemini
+from translator.second_translation import second_translation, tkdic_start, post_processing
+from translator.batch_translation import batch_translation
+from translator.backends import model_identity
+from translator.generation import generate_translations, stream_translation
+from translator.gemini_integration import refine_with_gemini, refine_many
+from translator import gemini_jobs, languages
 from utils.logger import error, info, debug
 from utils.error_codes import ErrorCode
 
-def trans_start(translated_text: str, tokenizer, base_model, actual_device):
+def _steps(langs: tuple[str, str] | None) -> tuple[bool, bool, bool]:
+    # (기본 번역, 사전 번역, Gemini 다듬기) 실행 여부
+    # 사용자 사전(영어 → 한국어 용어)과 Gemini 프롬프트(한국어로 답변)는 설정된 기본 언어쌍 전용이라
+    # 다른 언어쌍을 지정한 요청은 기본 모델 번역만 한다
+    if languages.is_default(langs):
+        return config.nomal_trans, config.per_post_trans, config.gemini_integration
+    return True, False, False
+
+
+# trans_start / trans_start_deferred / trans_stream 은 아래 단계 함수를 같이 쓴다
+# (캐시 조회 → 기본 번역 → 사전 번역 → Gemini 다듬기 → 캐시 저장), 스트리밍은 기본 번역만 토큰 단위로 흘려보낸다
+
+def _dictionary_pass(translated_text: str, tokenizer, base_model, actual_device, langs: tuple[str, str] | None,
+                     nomal_text: str | None = None) -> str:
+    # nomal_text: 먼저 끝난 기본 번역. BATCH_TRANS면 사전 치환이 없을 때 다시 번역하지 않고 그대로 쓴다
+    if nomal_text in translation_cache.ERROR_TEXTS or not config.batch_trans:
+        nomal_text = None
+    start = time.perf_counter()
+    per_text = second_translation(translated_text, config.tkdic_path, config.tkdic_select, tokenizer, base_model, actual_device, langs, nomal_text)
+    info(f"전처리 후처리 번역 소요 시간 : {(time.perf_counter() - start) * 1000:.1f}ms")
+    return per_text
+
+
+def _model_pass(translated_text: str, tokenizer, base_model, actual_device, langs: tuple[str, str] | None = None) -> tuple[str, str]:
+    nomal_text = ""
+    per_text = ""
+    nomal_trans, per_post_trans, _ = _steps(langs)
+    if config.batch_trans and nomal_trans and per_post_trans:
+        start = time.perf_counter()
+        nomal_text, per_text, timings = batch_translation(translated_text, config.tkdic_path, config.tkdic_select, tokenizer, base_model, actual_device, langs)
+        info(f"모델 번역 소요 시간 (배치) : {(time.perf_counter() - start) * 1000:.1f}ms {timings}")
+        return nomal_text, per_text
+
+    if nomal_trans:
+        start = time.perf_counter()
+        nomal_text = first_translation(translated_text, tokenizer, base_model, actual_device, langs)
+        info(f"기본 모델 번역 소요 시간 : {(time.perf_counter() - start) * 1000:.1f}ms")
+    else:
+        info("기본 모델 번역 비활성화")
+
+    if per_post_trans:
+        per_text = _dictionary_pass(translated_text, tokenizer, base_model, actual_device, langs)
+    else:
+        info("전처리 후처리 번역 비활성화")
+    return nomal_text, per_text
+
+
+def _refine_pass(translated_text: str, nomal_text: str, per_text: str, langs: tuple[str, str] | None) -> tuple[str, str]:
+    if _steps(langs)[2]:
+        return refine_with_gemini(translated_text, nomal_text, per_text)
+    info("Gemini 통합 비활성화")
+    return "", ""
+
+
+def _cache_lookup(translated_text: str, base_model, langs: tuple[str, str] | None = None) -> tuple[str | None, tuple | None]:
+    if not config.cache_enabled:
+        return None, None
+    cache_key = translation_cache.make_key(translated_text, model_identity(base_model), langs)
+    cached = translation_cache.lookup(cache_key)
+    if cached is not None:
+        info("번역 캐시 적중, 모델 번역을 건너뜁니다.")
+    return cache_key, cached
+
+
+def _cache_store(cache_key: str | None, result: tuple):
+    if cache_key is not None:
+        translation_cache.store(cache_key, result)
+
+
+def trans_start(translated_text: str, tokenizer, base_model, actual_device, langs: tuple[str, str] | None = None):
+    # langs = 요청이 지정한 (src_lang, tgt_lang), None이면 설정값
     nomal_text = ""
     per_text = ""
     refined_reson = ""
     refined_trans_text = ""
 
+    cache_key, cached = _cache_lookup(translated_text, base_model, langs)
+    if cached is not None:
+        return cached
+
+    try:
+        nomal_text, per_text = _model_pass(translated_text, tokenizer, base_model, actual_device, langs)
+        refined_reson, refined_trans_text = _refine_pass(translated_text, nomal_text, per_text, langs)
+
+    except Exception as e:
+        error("번역 실패.", e, ErrorCode.TRANSLATION_FAILED)
+        cache_key = None
+
+    _cache_store(cache_key, (nomal_text, per_text, refined_reson, refined_trans_text))
+
+    return nomal_text, per_text, refined_reson, refined_trans_text
+
+
+def trans_start_deferred(translated_text: str, tokenizer, base_model, actual_device, langs: tuple[str, str] | None = None):
+    # 모델 번역 결과는 바로 돌려주고 Gemini 다듬기는 백그라운드 작업으로 넘긴다
+    # 반환: (nomal, per, reson, refined, job_id), Gemini 결과가 아직 없으면 reson/refined는 빈 문자열
+    cache_key, cached = _cache_lookup(translated_text, base_model, langs)
+    if cached is not None:
+        return (*cached, None)
+
     try:
-        if config.nomal_trans:
-            nomal_text = first_translation(translated_text, tokenizer, base_model, actual_device)
+        nomal_text, per_text = _model_pass(translated_text, tokenizer, base_model, actual_device, langs)
+    except Exception as e:
+        error("번역 실패.", e, ErrorCode.TRANSLATION_FAILED)
+        return "", "", "", "", None
+
+    if not _steps(langs)[2]:
+        info("Gemini 통합 비활성화")
+        _cache_store(cache_key, (nomal_text, per_text, "", ""))
+        return nomal_text, per_text, "", "", None
+
+    def on_done(refined_reson: str, refined_trans_text: str):
+        _cache_store(cache_key, (nomal_text, per_text, refined_reson, refined_trans_text))
+
+    job = gemini_jobs.create(translated_text, nomal_text, per_text, on_done)
+    info(f"Gemini 다듬기 작업 등록 : {job.job_id}")
+    return nomal_text, per_text, "", "", job.job_id
+
+
+def trans_stream(translated_text: str, tokenizer, base_model, actual_device, langs: tuple[str, str] | None = None):
+    # 단계가 끝나는 대로 (이벤트 이름, 내용)을 내보낸다
+    # modelTrans는 토큰 단위 delta → 최종 text, 이후 prePostTrans, gemini 순서
+    # 기본 번역은 토큰을 바로 내보내야 해서 BATCH_TRANS여도 사전 번역과 한 generate로 묶지 않는다
+    # 대신 사전에서 치환한 용어가 없으면 기본 번역 결과를 사전 번역으로 그대로 쓴다 (배치 번역과 같은 결과)
+    nomal_trans, per_post_trans, _ = _steps(langs)
+    cache_key, cached = _cache_lookup(translated_text, base_model, langs)
+    if cached is not None:
+        nomal_text, per_text, refined_reson, refined_trans_text = cached
+        yield "modelTrans", {"text": nomal_text}
+        yield "prePostTrans", {"text": per_text}
+        yield "gemini", {"geminiReson": refined_reson, "geminiIntegra": refined_trans_text}
+        yield "done", {"status": "success"}
+        return
+
+    nomal_text = ""
+    per_text = ""
+    refined_reson = ""
+    refined_trans_text = ""
+    status = "success"
+    try:
+        if nomal_trans:
+            start = time.perf_counter()
+            pieces = []
+            try:
+                for piece in stream_translation(translated_text, tokenizer, base_model, actual_device, langs):
+                    pieces.append(piece)
+                    yield "modelTrans", {"delta": piece}
+                nomal_text = "".join(pieces)
+                info(f"기본 모델 번역 소요 시간 (스트리밍) : {(time.perf_counter() - start) * 1000:.1f}ms")
+            except Exception as e:
+                error("모델 번역 오류", e, ErrorCode.MODEL_TRANSLATION)
+                nomal_text = "[번역 오류 발생]"
         else:
             info("기본 모델 번역 비활성화")
+        yield "modelTrans", {"text": nomal_text}
 
-        if config.per_post_trans:
-            per_text = second_translation(translated_text, config.tkdic_path, config.tkdic_select, tokenizer, base_model, actual_device)
+        if per_post_trans:
+            per_text = _dictionary_pass(translated_text, tokenizer, base_model, actual_device, langs, nomal_text if nomal_trans else None)
         else:
             info("전처리 후처리 번역 비활성화")
+        yield "prePostTrans", {"text": per_text}
 
-        if config.gemini_integration:
-            refined_reson, refined_trans_text = refine_with_gemini(translated_text, nomal_text, per_text)
-        else:
-            info("Gemini 통합 비활성화")
+        refined_reson, refined_trans_text = _refine_pass(translated_text, nomal_text, per_text, langs)
+        yield "gemini", {"geminiReson": refined_reson, "geminiIntegra": refined_trans_text}
 
     except Exception as e:
         error("번역 실패.", e, ErrorCode.TRANSLATION_FAILED)
+        cache_key = None
+        status = "error"
+
+    _cache_store(cache_key, (nomal_text, per_text, refined_reson, refined_trans_text))
+    yield "done", {"status": status}
+
+
+def _batch_model_pass(texts: list[str], tokenizer, base_model, actual_device, langs: tuple[str, str] | None = None) -> list[tuple]:
+    # 기본 번역과 사전 번역 입력을 모두 모아 한번에 번역 (segment → 패딩 배치), texts는 모두 같은 언어쌍
+    nomal_trans, per_post_trans, _ = _steps(langs)
+    nomal_slots = [None] * len(texts)
+    per_slots = [None] * len(texts)
+    placeholder_maps = [{}] * len(texts)
+    batch_texts = []
+
+    if nomal_trans:
+        for index, text in enumerate(texts):
+            nomal_slots[index] = len(batch_texts)
+            batch_texts.append(text)
+
+    if per_post_trans:
+        for index, text in enumerate(texts):
+            preprocessed_text, placeholder_maps[index] = tkdic_start(text, config.tkdic_path, config.tkdic_select)
+            # 사전 치환이 없으면 기본 번역 결과를 그대로 사용
+            if preprocessed_text == text and nomal_slots[index] is not None:
+                per_slots[index] = nomal_slots[index]
+            else:
+                per_slots[index] = len(batch_texts)
+                batch_texts.append(preprocessed_text)
+
+    decoded = generate_translations(batch_texts, tokenizer, base_model, actual_device, langs=langs) if batch_texts else []
+    results = []
+    for index in range(len(texts)):
+        nomal_text = decoded[nomal_slots[index]] if nomal_slots[index] is not None else ""
+        per_text = post_processing(decoded[per_slots[index]], placeholder_maps[index]) if per_slots[index] is not None else ""
+        results.append((nomal_text, per_text))
+    return results
+
+
+def _batch_group(texts: list[str], indexes: list[int], langs: tuple[str, str], results: list, cache_keys: list,
+                 tokenizer, base_model, actual_device):
+    start = time.perf_counter()
+    try:
+        translated = _batch_model_pass([texts[index] for index in indexes], tokenizer, base_model, actual_device, langs)
+        info(f"배치 모델 번역 소요 시간 : {(time.perf_counter() - start) * 1000:.1f}ms ({len(indexes)}개, {langs[0]}→{langs[1]})")
+    except Exception as e:
+        # 한 항목 때문에 전체가 실패하지 않도록 항목별로 다시 번역
+        error("배치 번역 실패, 항목별로 다시 번역합니다.", e, ErrorCode.TRANSLATION_FAILED)
+        for index in indexes:
+            results[index] = trans_start(texts[index], tokenizer, base_model, actual_device, langs)
+        return
+
+    # Gemini 다듬기는 묶음 전체를 한번에 넘겨 동시 호출 제한(GEMINI_CONCURRENCY)까지 병렬로 처리
+    if _steps(langs)[2]:
+        refined = refine_many([(texts[index], nomal_text, per_text) for index, (nomal_text, per_text) in zip(indexes, translated)])
+    else:
+        refined = [("", "")] * len(indexes)
+
+    for index, (nomal_text, per_text), refinement in zip(indexes, translated, refined):
+        if isinstance(refinement, Exception):
+            error("배치 항목 번역 실패.", refinement, ErrorCode.TRANSLATION_FAILED)
+            results[index] = refinement
+            continue
+        results[index] = (nomal_text, per_text, *refinement)
+        _cache_store(cache_keys[index], results[index])
+
+
+def trans_batch(texts: list[str], tokenizer, base_model, actual_device, langs: list[tuple[str, str] | None] | None = None) -> list:
+    # 여러 문장을 한번에 번역. 항목별로 (nomal, per, reson, refined) 결과나 예외를 돌려준다
+    # langs = 항목별 언어쌍 (None이면 모두 설정값), 같은 언어쌍끼리 묶어서 번역한다
+    langs = [languages.resolve(pair) for pair in langs] if langs is not None else [languages.resolve(None)] * len(texts)
+    results = [None] * len(texts)
+    cache_keys = [None] * len(texts)
+    pending = {}
+    for index, text in enumerate(texts):
+        if config.cache_enabled:
+            cache_keys[index] = translation_cache.make_key(text, model_identity(base_model), langs[index])
+            cached = translation_cache.lookup(cache_keys[index])
+            if cached is not None:
+                results[index] = cached
+                continue
+        pending.setdefault(langs[index], []).append(index)
 
-    return nomal_text, per_text, refined_reson, refined_trans_text
\ No newline at end of file
+    for pair, indexes in pending.items():
+        _batch_group(texts, indexes, pair, results, cache_keys, tokenizer, base_model, actual_device)
+    return results
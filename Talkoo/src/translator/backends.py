@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+import config
+from model_precision import detect_precision
+from translator import languages
+from utils import metrics
+from utils.logger import error, info
+from utils.error_codes import ErrorCode
+
+# 번역 파이프라인은 encode → generate → decode 만 알면 되도록 추론 엔진을 감싼다
+# INFERENCE_BACKEND: torch = HuggingFace generate (기본), ctranslate2 = 변환된 모델을 CTranslate2 CPU/GPU 런타임으로 실행
+# ctranslate2는 선택 패키지라 requirements.txt에 없다 (쓰려면 pip install ctranslate2, 없으면 torch로 실행)
+# langs = (src_lang, tgt_lang), 한 번의 호출 안에서는 모든 문장이 같은 언어쌍
+
+
+class InferenceBackend(ABC):
+    # encode/generate/decode를 빠뜨린 백엔드는 요청 도중이 아니라 만들 때 TypeError로 실패한다
+    name = ""
+    name_or_path = ""
+    precision = ""  # 실제로 쓰는 연산 정밀도 (캐시 키용)
+    device = "cpu"
+
+    @abstractmethod
+    def encode(self, texts: list[str], langs: tuple[str, str]):
+        ...
+
+    @abstractmethod
+    def generate(self, encoded, langs: tuple[str, str]):
+        ...
+
+    @abstractmethod
+    def decode(self, generated) -> list[str]:
+        ...
+
+    def count_tokens(self, encoded) -> int:
+        # 패딩을 뺀 입력 토큰 수 (메트릭용)
+        return 0
+
+    def count_generated(self, generated) -> int:
+        # 디코더 시작 토큰과 패딩을 뺀 출력 토큰 수 (메트릭용)
+        return 0
+
+    def stream(self, text: str, stop_event: threading.Event, langs: tuple[str, str] | None = None):
+        # 기본 구현: 한번에 번역해서 통째로 내보낸다
+        yield from self.translate([text], langs=langs)
+
+    def translate(self, texts: list[str], langs: tuple[str, str] | None = None) -> list[str]:
+        langs = languages.resolve(langs)
+        start = time.perf_counter()
+        encoded = self.encode(texts, langs)
+        encoded_at = time.perf_counter()
+        generated = self.generate(encoded, langs)
+        generated_at = time.perf_counter()
+        translations = self.decode(generated)
+        decoded_at = time.perf_counter()
+
+        metrics.observe_stage("tokenize", encoded_at - start)
+        metrics.observe_stage("generate", generated_at - encoded_at)
+        metrics.observe_stage("decode", decoded_at - generated_at)
+        metrics.TOKENS.inc(self.count_tokens(encoded), ("in",))
+        metrics.TOKENS.inc(self.count_generated(generated), ("out",))
+        return translations
+
+
+class _StopOnEvent(StoppingCriteria):
+    # 스트리밍을 받던 클라이언트가 끊기면 남은 토큰 생성을 멈춘다
+    def __init__(self, event: threading.Event):
+        self.event = event
+        self.length = 0  # 지금까지 만든 디코더 토큰 수 (시작 토큰 포함)
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        self.length = input_ids.shape[-1]
+        return self.event.is_set()
+
+
+class TorchBackend(InferenceBackend):
+    name = "torch"
+
+    def __init__(self, tokenizer, base_model, actual_device):
+        self.tokenizer = tokenizer
+        self.base_model = base_model
+        self.device = actual_device
+        self.name_or_path = getattr(base_model, "name_or_path", "")
+
+    def encode(self, texts: list[str], langs: tuple[str, str]):
+        return languages.pad_ids(self.tokenizer, languages.encode_ids(self.tokenizer, texts, langs[0]), self.device)
+
+    def generate(self, encoded, langs: tuple[str, str], **kwargs):
+        with torch.no_grad():
+            return self.base_model.generate(
+                **encoded,
+                forced_bos_token_id=self.tokenizer.convert_tokens_to_ids(langs[1]),
+                max_length=512,
+                **kwargs
+            )
+
+    def decode(self, generated) -> list[str]:
+        return self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+
+    def count_tokens(self, encoded) -> int:
+        return int(encoded["attention_mask"].sum())
+
+    def count_generated(self, generated) -> int:
+        return int((generated[:, 1:] != self.tokenizer.pad_token_id).sum())
+
+    def stream(self, text: str, stop_event: threading.Event, langs: tuple[str, str] | None = None):
+        # generate가 만드는 토큰을 문자열 조각으로 바로 내보낸다
+        langs = languages.resolve(langs)
+        start = time.perf_counter()
+        encoded = self.encode([text], langs)
+        metrics.observe_stage("tokenize", time.perf_counter() - start)
+        metrics.TOKENS.inc(self.count_tokens(encoded), ("in",))
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stopper = _StopOnEvent(stop_event)
+        failure = []
+
+        def run():
+            try:
+                self.generate(encoded, langs, streamer=streamer, stopping_criteria=StoppingCriteriaList([stopper]))
+            except Exception as e:
+                failure.append(e)
+                streamer.end()
+
+        start = time.perf_counter()
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        try:
+            for piece in streamer:
+                if piece:
+                    yield piece
+            worker.join()
+        finally:
+            # 스트리밍은 생성과 디코딩이 겹치므로 전체를 generate로 센다
+            metrics.observe_stage("generate", time.perf_counter() - start)
+            metrics.TOKENS.inc(max(0, stopper.length - 1), ("out",))
+        if failure:
+            raise failure[0]
+
+
+# MODEL_PRECISION → CTranslate2 compute_type
+_CT2_COMPUTE_TYPES = {"fp32": "float32", "bf16": "bfloat16", "int8": "int8"}
+
+
+class CTranslate2Backend(InferenceBackend):
+    name = "ctranslate2"
+
+    def __init__(self, tokenizer, model_name: str, actual_device: str):
+        # ctranslate2는 선택 의존성이므로 이 백엔드를 쓸 때만 불러온다
+        import ctranslate2
+
+        self.tokenizer = tokenizer
+        self.device = actual_device
+        self.name_or_path = model_name
+        model_path = os.path.join(config.ct2_model_path, model_name.replace("/", "--"))
+        if not os.path.isfile(os.path.join(model_path, "model.bin")):
+            # 변환된 모델이 없으면 처음 한번만 HuggingFace 모델을 변환해 둔다
+            info(f"CTranslate2 모델 변환 중 : {model_name} → {model_path}")
+            ctranslate2.converters.TransformersConverter(model_name).convert(model_path, force=True)
+
+        self.translator = ctranslate2.Translator(
+            model_path,
+            device="cuda" if str(actual_device).startswith("cuda") else "cpu",
+            compute_type=_CT2_COMPUTE_TYPES.get(config.model_precision, "default"),
+            inter_threads=max(1, config.ct2_inter_threads),
+            intra_threads=max(0, config.ct2_intra_threads),
+        )
+        # 장치가 지원하지 않으면 CTranslate2가 다른 compute_type으로 바꾸므로 실제 값을 남긴다
+        self.precision = getattr(self.translator, "compute_type", _CT2_COMPUTE_TYPES.get(config.model_precision, "default"))
+        info(f"CTranslate2 모델 로드 완료 : {model_path} ({self.precision})")
+
+    def encode(self, texts: list[str], langs: tuple[str, str]):
+        encoded = languages.encode_ids(self.tokenizer, texts, langs[0])
+        return [self.tokenizer.convert_ids_to_tokens(ids) for ids in encoded]
+
+    def generate(self, encoded, langs: tuple[str, str]):
+        if not encoded:
+            return []
+        return self.translator.translate_batch(
+            encoded,
+            target_prefix=[[langs[1]]] * len(encoded),
+            max_batch_size=max(1, config.micro_batch_size),
+            beam_size=1,
+            max_decoding_length=512,
+        )
+
+    def decode(self, generated) -> list[str]:
+        return [
+            self.tokenizer.decode(self.tokenizer.convert_tokens_to_ids(result.hypotheses[0]), skip_special_tokens=True)
+            for result in generated
+        ]
+
+    def count_tokens(self, encoded) -> int:
+        return sum(len(tokens) for tokens in encoded)
+
+    def count_generated(self, generated) -> int:
+        return sum(len(result.hypotheses[0]) for result in generated)
+
+    def stream(self, text: str, stop_event: threading.Event, langs: tuple[str, str] | None = None):
+        langs = languages.resolve(langs)
+        start = time.perf_counter()
+        encoded = self.encode([text], langs)[0]
+        metrics.observe_stage("tokenize", time.perf_counter() - start)
+        metrics.TOKENS.inc(len(encoded), ("in",))
+        token_ids = []
+        emitted = ""
+        start = time.perf_counter()
+        try:
+            for step in self.translator.generate_tokens(encoded, target_prefix=[langs[1]], max_decoding_length=512):
+                if stop_event.is_set():
+                    break
+                token_ids.append(step.token_id)
+                # 토큰 경계가 글자 경계와 다를 수 있으므로 전체를 다시 디코딩해서 늘어난 부분만 내보낸다
+                decoded = self.tokenizer.decode(token_ids, skip_special_tokens=True)
+                if len(decoded) > len(emitted) and not decoded.endswith("�"):
+                    yield decoded[len(emitted):]
+                    emitted = decoded
+        finally:
+            metrics.observe_stage("generate", time.perf_counter() - start)
+            metrics.TOKENS.inc(len(token_ids), ("out",))
+
+
+def create_backend(tokenizer, model_name: str, actual_device: str) -> InferenceBackend | None:
+    # 설정된 백엔드가 torch가 아니면 미리 만들어 base_model 자리에 둔다. 실패하면 None (torch로 실행)
+    if config.inference_backend == "torch":
+        return None
+    try:
+        if config.inference_backend == "ctranslate2":
+            return CTranslate2Backend(tokenizer, model_name, actual_device)
+        error(f"알 수 없는 추론 백엔드 : {config.inference_backend}, torch로 실행합니다.", None, ErrorCode.MODEL_INPUT)
+    except ImportError as e:
+        error(f"{config.inference_backend} 패키지가 설치되어 있지 않습니다 (pip install {config.inference_backend} 필요), torch로 실행합니다.", e, ErrorCode.BASE_MODEL_LOAD_FAIL)
+    except Exception as e:
+        error(f"{config.inference_backend} 백엔드 로드 실패, torch로 실행합니다.", e, ErrorCode.BASE_MODEL_LOAD_FAIL)
+    return None
+
+
+def model_identity(base_model) -> str:
+    # 번역 캐시/번역 메모리 키에 쓰는 모델 식별자: 이름 + 실제 백엔드 + 실제 정밀도
+    # 설정값(MODEL_PRECISION/INFERENCE_BACKEND)은 모델 교체 전에 바뀌거나 로드 실패로 torch로 돌아갈 수 있어서
+    # 결과를 만든 모델 객체에서 읽는다. 한번 계산하면 모델 객체에 붙여둔다 (model_manager가 로드할 때 미리 계산)
+    identity = getattr(base_model, "talkoo_identity", None)
+    if identity is None:
+        if isinstance(base_model, InferenceBackend):
+            backend, precision = base_model.name, base_model.precision
+        else:
+            backend, precision = TorchBackend.name, detect_precision(base_model)
+        identity = f"{getattr(base_model, 'name_or_path', '')}|{backend}|{precision}"
+        base_model.talkoo_identity = identity
+    return identity
+
+
+def get_backend(tokenizer, base_model, actual_device) -> InferenceBackend:
+    # base_model 자리에 이미 백엔드가 들어있으면 그대로, 아니면 torch 모델을 감싼 백엔드를 돌려준다
+    if isinstance(base_model, InferenceBackend):
+        return base_model
+    # 매번 가볍게 감싸기만 하고 따로 보관하지 않는다 (교체된 모델이 메모리에 남지 않도록)
+    return TorchBackend(tokenizer, base_model, actual_device)
@@ -0,0 +1,186 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import config
+from translator import generation, languages
+from utils import metrics
+from utils.logger import error, debug, info
+from utils.error_codes import ErrorCode
+
+
+class _BatchJob:
+    # 한 요청이 넘긴 문장 묶음 (최대 max_batch_size개). 같은 묶음의 문장들은 항상 같은 배치로 들어간다.
+    __slots__ = ("texts", "langs", "bucket", "future", "queued_at", "timings")
+
+    def __init__(self, texts: list[str], langs: tuple[str, str]):
+        self.texts = texts
+        self.langs = langs
+        # 문자 길이를 2의 거듭제곱 단위로 버킷팅 → 패딩 낭비는 최대 2배
+        # 언어쌍이 다르면 입력 언어 토큰과 forced BOS가 달라 한 generate로 묶을 수 없으므로 버킷을 나눈다
+        self.bucket = (langs, max(len(text) for text in texts).bit_length() if texts else 0)
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+        # 요청한 쪽의 단계 시간 기록 (배치는 스케줄러 스레드에서 돌므로 끝나고 나눠 적는다)
+        self.timings = metrics.current_timings()
+
+
+class MicroBatchScheduler:
+    def __init__(self, tokenizer, base_model, actual_device, max_batch_size: int = 8, max_wait_ms: int = 10):
+        self.tokenizer = tokenizer
+        self.base_model = base_model
+        self.actual_device = actual_device
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._running = False
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="talkoo-microbatch", daemon=True)
+        self._thread.start()
+        info(f"마이크로 배치 스케줄러 시작 (최대 배치 {self.max_batch_size}, 최대 대기 {self.max_wait * 1000:.0f}ms)")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(None)
+        self._thread.join()
+        info("마이크로 배치 스케줄러 종료")
+
+    def translate(self, texts: list[str], langs: tuple[str, str] | None = None) -> list[str]:
+        if not texts:
+            return []
+        if not self._running:
+            raise RuntimeError("마이크로 배치 스케줄러가 실행 중이 아닙니다.")
+        langs = languages.resolve(langs)
+        # 긴 문서처럼 한 요청이 배치 크기보다 많은 문장을 넘기면 배치 크기만큼씩 나눠 넣는다
+        # (generate 한번의 크기가 MICRO_BATCH_SIZE를 넘지 않도록, 사이사이에 다른 요청도 끼어들 수 있다)
+        jobs = [_BatchJob(list(texts[start:start + self.max_batch_size]), langs)
+                for start in range(0, len(texts), self.max_batch_size)]
+        for job in jobs:
+            self._queue.put(job)
+        return [translation for job in jobs for translation in job.future.result()]
+
+    def _collect(self, first: _BatchJob) -> list[_BatchJob]:
+        jobs = [first]
+        bucket_sizes = {first.bucket: len(first.texts)}
+        deadline = time.monotonic() + self.max_wait
+
+        # 버킷 하나가 가득 차거나 대기 시간이 끝날 때까지 모은다
+        while max(bucket_sizes.values()) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)
+                break
+            jobs.append(job)
+            bucket_sizes[job.bucket] = bucket_sizes.get(job.bucket, 0) + len(job.texts)
+        return jobs
+
+    def _flush(self, jobs: list[_BatchJob]):
+        buckets = {}
+        for job in jobs:
+            buckets.setdefault(job.bucket, []).append(job)
+
+        for bucket_jobs in buckets.values():
+            batch = []
+            for job in bucket_jobs:
+                # 배치 크기를 넘기면 먼저 모인 것부터 실행
+                if batch and sum(len(j.texts) for j in batch) + len(job.texts) > self.max_batch_size:
+                    self._run_batch(batch)
+                    batch = []
+                batch.append(job)
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, jobs: list[_BatchJob]):
+        texts = [text for job in jobs for text in job.texts]
+        try:
+            start = time.perf_counter()
+            for job in jobs:
+                metrics.observe_stage("queue_wait", start - job.queued_at)
+                metrics.add_timing(job.timings, "queue_wait", start - job.queued_at)
+            with metrics.request_timings() as batch_timings:
+                translations = generation.run_generate(texts, self.tokenizer, self.base_model, self.actual_device, langs=jobs[0].langs)
+            # 같은 배치에 들어간 요청은 모두 배치 전체 시간만큼 기다렸으므로 각자 그대로 더한다
+            for job in jobs:
+                for stage, seconds in batch_timings.items():
+                    metrics.add_timing(job.timings, stage, seconds)
+            debug(f"마이크로 배치 실행 : 요청 {len(jobs)}개, 문장 {len(texts)}개, {jobs[0].langs[0]}→{jobs[0].langs[1]}, {(time.perf_counter() - start) * 1000:.1f}ms")
+        except Exception as e:
+            error("마이크로 배치 번역 중 오류 발생", e, ErrorCode.MODEL_TRANSLATION)
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+
+        offset = 0
+        for job in jobs:
+            job.future.set_result(translations[offset:offset + len(job.texts)])
+            offset += len(job.texts)
+
+    def _run(self):
+        while self._running:
+            job = self._queue.get()
+            if job is None:
+                break
+            self._flush(self._collect(job))
+
+        # 종료 시 남아있는 요청은 실패 처리
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            if job is not None:
+                job.future.set_exception(RuntimeError("마이크로 배치 스케줄러가 종료되었습니다."))
+
+
+# 모델 풀을 쓰면 모델마다 스케줄러가 하나씩 돈다
+_schedulers: dict[int, MicroBatchScheduler] = {}
+_lock = threading.Lock()
+
+
+def start_scheduler(tokenizer, base_model, actual_device) -> MicroBatchScheduler:
+    stop_scheduler(base_model)
+    scheduler = MicroBatchScheduler(
+        tokenizer, base_model, actual_device,
+        max_batch_size=config.micro_batch_size,
+        max_wait_ms=config.micro_batch_wait_ms
+    )
+    scheduler.start()
+    with _lock:
+        _schedulers[id(base_model)] = scheduler
+    return scheduler
+
+
+def stop_scheduler(base_model=None):
+    # base_model을 넘기지 않으면 전부 종료
+    with _lock:
+        if base_model is None:
+            schedulers = list(_schedulers.values())
+            _schedulers.clear()
+        else:
+            scheduler = _schedulers.pop(id(base_model), None)
+            schedulers = [scheduler] if scheduler is not None else []
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def get_scheduler(base_model) -> MicroBatchScheduler | None:
+    # 이 모델로 동작 중인 스케줄러가 없으면 사용하지 않음
+    scheduler = _schedulers.get(id(base_model))
+    if scheduler is not None and scheduler.base_model is base_model:
+        return scheduler
+    return None
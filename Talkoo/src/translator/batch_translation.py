@@ -0,0 +1,41 @@
+from utils.logger import error, debug, info
+from utils.error_codes import ErrorCode
+from utils import metrics
+from translator.second_translation import tkdic_start, post_processing
+from translator.generation import generate_translations
+
+
+def batch_translation(translate_text: str, tk_path: str, tk_select: str, tokenizer, base_model, actual_device,
+                      langs: tuple[str, str] | None = None):
+    # 기본 번역과 사전 번역을 하나의 배치로 묶어 encoder/decoder를 한번만 돌린다.
+    # timings: 이 호출의 단계별 소요 시간(ms), 바깥 요청의 기록에도 그대로 더해진다
+    with metrics.request_timings() as stage_seconds:
+        nomal_text, per_text = _batch_translation(translate_text, tk_path, tk_select, tokenizer, base_model, actual_device, langs)
+    return nomal_text, per_text, metrics.timings_ms(stage_seconds)
+
+
+def _batch_translation(translate_text: str, tk_path: str, tk_select: str, tokenizer, base_model, actual_device,
+                       langs: tuple[str, str] | None):
+    try:
+        preprocessed_text, placeholder_map = tkdic_start(translate_text, tk_path, tk_select)
+
+        # 사전 치환이 하나도 없으면 같은 문장을 두번 번역할 필요가 없음
+        if preprocessed_text == translate_text:
+            batch_texts = [translate_text]
+        else:
+            batch_texts = [translate_text, preprocessed_text]
+
+        decoded = generate_translations(batch_texts, tokenizer, base_model, actual_device, langs)
+
+        nomal_text = decoded[0]
+        debug(f"NLLB 번역 결과 (후처리 전): {decoded[-1]}")
+        per_text = post_processing(decoded[-1], placeholder_map)
+
+        info(f"모델 번역 : {nomal_text}")
+        info(f"최종 번역 결과 (후처리 후): {per_text}")
+
+        return nomal_text, per_text
+
+    except Exception as e:
+        error("batch_translation 중 오류 발생", e, ErrorCode.MODEL_TRANSLATION)
+        return "[번역 오류 발생]", "[번역 오류 발생]"
@@ -1,32 +1,20 @@
-import torch
-import config
 from utils.logger import error, debug, info
 from utils.error_codes import ErrorCode
+from translator import languages
+from translator.generation import generate_translations
 
-def first_translation(translate_text: str, tokenizer, base_model, actual_device):
+def first_translation(translate_text: str, tokenizer, base_model, actual_device, langs: tuple[str, str] | None = None):
     try:
         debug("모델 번역 실행중")
         
-        tokenizer.src_lang = config.src_lang
+        # 공유 tokenizer의 src_lang은 바꾸지 않고 요청의 언어쌍을 그대로 넘긴다
+        src_lang, tgt_lang = languages.resolve(langs)
 
-        inputs = tokenizer(translate_text, return_tensors="pt", max_length=512, truncation=True)
-        inputs = inputs.to(actual_device)
-
-        debug(f"Tokenizer의 src_lang 설정: {tokenizer.src_lang}")
-        debug(f"Forced BOS Token ID: {tokenizer.convert_tokens_to_ids(config.tgt_lang)}")
-        debug(f"Forced BOS Token (디코딩): {tokenizer.decode(tokenizer.convert_tokens_to_ids(config.tgt_lang))}")
-        
-        with torch.no_grad():
-            generated_tokens = base_model.generate(
-                **inputs,
-                forced_bos_token_id=tokenizer.convert_tokens_to_ids(config.tgt_lang),
-                max_length=512,
-                num_return_sequences=1,
-                temperature=0.7,
-                do_sample=False
-            )
+        debug(f"입력 언어: {src_lang}")
+        debug(f"Forced BOS Token ID: {tokenizer.convert_tokens_to_ids(tgt_lang)}")
+        debug(f"Forced BOS Token (디코딩): {tokenizer.decode(tokenizer.convert_tokens_to_ids(tgt_lang))}")
         
-        translation = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
+        translation = generate_translations([translate_text], tokenizer, base_model, actual_device, langs=(src_lang, tgt_lang))[0]
         info(f"모델 번역 : {translation}")
 
         return translation
@@ -0,0 +1,39 @@
+import hashlib
+import config
+from translation_cache import ERROR_TEXTS
+from utils.cache_store import TwoTierCache
+
+_cache: TwoTierCache | None = None
+
+
+def get_cache() -> TwoTierCache:
+    global _cache
+    if _cache is None:
+        _cache = TwoTierCache("gemini_cache", config.cache_path, config.gemini_cache_memory_size, config.gemini_cache_disk_size)
+    return _cache
+
+
+def make_key(translated_text: str, text1: str, text2: str | None, prompt_version: int) -> str:
+    # 같은 (원문, 모델 번역, 사전 번역)과 같은 프롬프트/모델이면 Gemini 결과도 재사용
+    raw = "\x1f".join((translated_text, text1 or "", text2 or "", str(prompt_version), config.gemini_model))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(key: str) -> tuple | None:
+    value = get_cache().get(key)
+    return tuple(value) if value is not None else None
+
+
+def store(key: str, refined_reson: str, refined_trans_text: str):
+    # 실패 문구는 저장하지 않는다
+    if refined_reson in ERROR_TEXTS or refined_trans_text in ERROR_TEXTS:
+        return
+    get_cache().set(key, [refined_reson, refined_trans_text])
+
+
+def invalidate():
+    get_cache().clear()
+
+
+def stats() -> dict:
+    return get_cache().stats()
@@ -1,9 +1,17 @@
+import asyncio
 import json
+from concurrent.futures import Future
+import random
+import threading
+import time
+import httpx
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from utils.logger import debug, info, error
 import config
 from utils.error_codes import ErrorCode
+from translator import gemini_cache
+from utils import metrics
 
 my_safety_settings = [
     types.SafetySetting(
@@ -24,17 +32,11 @@ my_safety_settings = [
     ),
 ]
 
-def refine_with_gemini(translated_text, text1: str, text2: str = None):
-    response = None
-    try:
-        if text2:
-            instruction = "주어진 한국어 문장 두개를 자연스럽게 병합하며 다듬고"
-            input_text = f"문장 1: {text1}, 문장 2: {text2}, 원문 {translated_text}"
-        else:
-            instruction = "주어진 한국어 문장을 자연스럽게 다듬고"
-            input_text = f"문장 {text1}, 원문, 원문 {translated_text}"
-        
-        prompt = f"""
+# 프롬프트 내용을 바꾸면 올려서 이전 프롬프트로 받은 캐시 결과를 쓰지 않게 한다
+PROMPT_VERSION = 1
+
+# 프롬프트는 매 호출마다 새로 만들지 않고 템플릿에 두 칸만 채운다
+_PROMPT_TEMPLATE = """
         핵심 임무
         당신은 원문의 뉘앙스와 구조를 최대한 보존하는 직역(direct translation) 전문 번역가입니다. {instruction} 입력된 텍스트를 번역하세요.
         용어의 설명 : 여기서 말하는 '병합'은 두 문장을 (문장1)(문장2) 형식의 병합이 아니라 두 문장을 합쳐서 어색한 부분을 다듬으라는 뜻입니다.
@@ -60,20 +62,129 @@ def refine_with_gemini(translated_text, text1: str, text2: str = None):
         }}
         """
 
+_INSTRUCTION_MERGE = "주어진 한국어 문장 두개를 자연스럽게 병합하며 다듬고"
+_INSTRUCTION_SINGLE = "주어진 한국어 문장을 자연스럽게 다듬고"
+
+_GENERATE_CONFIG = types.GenerateContentConfig(
+    response_mime_type='application/json',
+    safety_settings=my_safety_settings
+)
+
+# 일시적인 오류로 보고 다시 시도하는 HTTP 상태 코드
+_RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def build_prompt(translated_text, text1: str, text2: str = None) -> str:
+    if text2:
+        return _PROMPT_TEMPLATE.format(instruction=_INSTRUCTION_MERGE, input_text=f"문장 1: {text1}, 문장 2: {text2}, 원문 {translated_text}")
+    return _PROMPT_TEMPLATE.format(instruction=_INSTRUCTION_SINGLE, input_text=f"문장 {text1}, 원문, 원문 {translated_text}")
+
+
+class _RateLimiter:
+    # 분당 요청 수 제한: 요청 사이 간격을 일정하게 벌린다 (0 = 제한 없음)
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.next_time = 0.0
+
+    async def acquire(self):
+        if self.per_minute <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        wait = self.next_time - now
+        self.next_time = max(now, self.next_time) + 60.0 / self.per_minute
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class _GeminiRunner:
+    # 전용 이벤트 루프 스레드에서 비동기 클라이언트 하나를 계속 재사용한다 (연결 풀 유지)
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="talkoo-gemini", daemon=True)
+        self.thread.start()
+        self.client = None
+        self.client_key = None
+        self.semaphore = None
+        self.semaphore_size = None
+        self.limiter = None
+
+    def _get_client(self):
+        # API 키나 접속 주소가 바뀌면 새 클라이언트로 교체
+        key = (config.gemini_api, config.gemini_base_url)
+        if self.client is None or self.client_key != key:
+            http_options = types.HttpOptions(base_url=config.gemini_base_url) if config.gemini_base_url else None
+            self.client = genai.Client(api_key=config.gemini_api, http_options=http_options)
+            self.client_key = key
+        return self.client
+
+    def _limits(self):
+        if self.semaphore is None or self.semaphore_size != config.gemini_concurrency:
+            self.semaphore = asyncio.Semaphore(max(1, config.gemini_concurrency))
+            self.semaphore_size = config.gemini_concurrency
+        if self.limiter is None or self.limiter.per_minute != config.gemini_rpm:
+            self.limiter = _RateLimiter(config.gemini_rpm)
+        return self.semaphore, self.limiter
+
+    async def generate(self, prompt: str):
+        client = self._get_client()
+        semaphore, limiter = self._limits()
+        for attempt in range(max(0, config.gemini_retries) + 1):
+            try:
+                async with semaphore:
+                    await limiter.acquire()
+                    return await asyncio.wait_for(
+                        client.aio.models.generate_content(model=config.gemini_model, contents=prompt, config=_GENERATE_CONFIG),
+                        timeout=config.gemini_timeout
+                    )
+            except Exception as e:
+                if attempt >= config.gemini_retries or not _is_retryable(e):
+                    raise
+                delay = config.gemini_backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+                debug(f"Gemini 호출 재시도 {attempt + 1}/{config.gemini_retries} ({delay:.2f}초 후) : {e!r}")
+                await asyncio.sleep(delay)
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    return isinstance(e, errors.APIError) and e.code in _RETRY_STATUS
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def _get_runner() -> _GeminiRunner:
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = _GeminiRunner()
+    return _runner
+
+
+async def _refine(translated_text, text1: str, text2: str = None):
+    response = None
+    runner = _get_runner()
+    try:
+        prompt = build_prompt(translated_text, text1, text2)
+
         try:
-            client = genai.Client(api_key=config.gemini_api)
+            runner._get_client()
         except Exception as e:
             error(f"API 키 오류 {config.gemini_api}", e, ErrorCode.GEMINI_API_ERROR)
             return "[API 키 오류]", "[API 키 오류]"
 
-        response = client.models.generate_content(
-            model='gemini-1.5-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type='application/json',
-                safety_settings=my_safety_settings
-            )
-        )
+        # 재시도와 동시 호출 제한 대기를 포함한 API 호출 시간
+        start = time.perf_counter()
+        try:
+            response = await runner.generate(prompt)
+        finally:
+            metrics.observe_stage("gemini", time.perf_counter() - start)
 
         if not response.text:
             error("Gemini 응답이 비어있습니다. 안전 설정 문제일 수 있습니다.", None, ErrorCode.UNKNOWN)
@@ -95,4 +206,59 @@ def refine_with_gemini(translated_text, text1: str, text2: str = None):
 
     except Exception as e:
         error(f"Gemini API 호출 중 알 수 없는 오류", e, ErrorCode.UNKNOWN)
-        return "[API 호출 실패]", "[API 호출 실패]"
\ No newline at end of file
+        return "[API 호출 실패]", "[API 호출 실패]"
+
+
+def _cached(translated_text, text1: str, text2: str = None):
+    if not config.gemini_cache:
+        return None, None
+    key = gemini_cache.make_key(translated_text, text1, text2, PROMPT_VERSION)
+    cached = gemini_cache.lookup(key)
+    if cached is not None:
+        info("Gemini 캐시 적중, API 호출을 건너뜁니다.")
+    return key, cached
+
+
+async def _refine_and_store(key, translated_text, text1: str, text2: str = None, timings: dict | None = None):
+    # Gemini 루프는 다른 스레드라 요청의 컨텍스트가 따라오지 않으므로 단계 시간 기록을 넘겨받아 이어 쓴다
+    metrics.bind_timings(timings)
+    refined_reson, refined_trans_text = await _refine(translated_text, text1, text2)
+    if key is not None:
+        gemini_cache.store(key, refined_reson, refined_trans_text)
+    return refined_reson, refined_trans_text
+
+
+def submit_refinement(translated_text, text1: str, text2: str = None, timings: dict | None = None) -> Future:
+    # 기다리지 않고 Future만 돌려준다. 결과는 (reson, trans_text)
+    # timings: 결과를 기다리는 요청의 단계 시간 기록 (나중에 조회하는 작업은 응답이 먼저 나가므로 넘기지 않는다)
+    key, cached = _cached(translated_text, text1, text2)
+    if cached is not None:
+        future = Future()
+        future.set_result(cached)
+        return future
+    return _get_runner().submit(_refine_and_store(key, translated_text, text1, text2, timings))
+
+
+def refine_with_gemini(translated_text, text1: str, text2: str = None):
+    # 요청 스레드는 결과만 기다리고, 실제 호출/재시도는 Gemini 전용 루프에서 처리
+    return submit_refinement(translated_text, text1, text2, metrics.current_timings()).result()
+
+
+def refine_many(items: list[tuple]) -> list:
+    # items = [(translated_text, text1, text2), ...] 를 한꺼번에 Gemini 루프에 넘기고 입력 순서대로 결과를 모은다
+    # 동시 호출 수는 GEMINI_CONCURRENCY 세마포어가, 분당 호출 수는 GEMINI_RPM이 그대로 제한한다
+    # 항목별로 (reson, trans_text) 또는 예외를 돌려준다 (하나가 실패해도 나머지 결과는 그대로)
+    timings = metrics.current_timings()
+    futures = []
+    for translated_text, text1, text2 in items:
+        try:
+            futures.append(submit_refinement(translated_text, text1, text2, timings))
+        except Exception as e:
+            futures.append(e)
+    results = []
+    for future in futures:
+        try:
+            results.append(future if isinstance(future, Exception) else future.result())
+        except Exception as e:
+            results.append(e)
+    return results
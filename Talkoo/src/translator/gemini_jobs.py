@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+import uuid
+import config
+from translation_cache import ERROR_TEXTS
+from translator.gemini_integration import submit_refinement
+from utils.logger import debug, error
+from utils.error_codes import ErrorCode
+
+
+class GeminiJob:
+    # Gemini 다듬기 작업 하나의 상태. status: pending → done / error
+    __slots__ = ("job_id", "status", "refined_reson", "refined_trans_text", "created", "finished", "event")
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = "pending"
+        self.refined_reson = ""
+        self.refined_trans_text = ""
+        self.created = time.monotonic()
+        self.finished = None
+        self.event = threading.Event()
+
+    def complete(self, status: str, refined_reson: str, refined_trans_text: str):
+        self.refined_reson = refined_reson
+        self.refined_trans_text = refined_trans_text
+        self.status = status
+        self.finished = time.monotonic()
+        _share(self)
+        self.event.set()
+
+    def wait(self, timeout: float) -> bool:
+        return self.event.wait(timeout)
+
+
+class _SharedJob(GeminiJob):
+    # 다른 워커가 만든 작업. 그 워커가 남긴 파일을 다시 읽어 상태를 확인한다
+    __slots__ = ()
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.status == "pending" and time.monotonic() < deadline:
+            time.sleep(0.2)
+            latest = _load_shared(self.job_id)
+            if latest is not None:
+                self.status, self.refined_reson, self.refined_trans_text = latest.status, latest.refined_reson, latest.refined_trans_text
+        return self.status != "pending"
+
+
+_jobs = {}
+_lock = threading.Lock()
+_last_shared_purge = 0.0
+
+
+def _shared_dir() -> str:
+    return os.path.join(config.cache_path, "gemini_jobs")
+
+
+def _share(job: GeminiJob):
+    # 멀티 워커 모드에서는 결과 조회가 다른 워커로 갈 수 있으므로 작업 상태를 파일로도 남긴다
+    if config.workers <= 1:
+        return
+    try:
+        os.makedirs(_shared_dir(), exist_ok=True)
+        path = os.path.join(_shared_dir(), f"{job.job_id}.json")
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"status": job.status, "refined_reson": job.refined_reson, "refined_trans_text": job.refined_trans_text}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except OSError as e:
+        error("Gemini 작업 상태 공유 실패", e, ErrorCode.GEMINI_API_ERROR)
+
+
+def _load_shared(job_id: str) -> GeminiJob | None:
+    if config.workers <= 1 or not job_id.isalnum():
+        return None
+    try:
+        with open(os.path.join(_shared_dir(), f"{job_id}.json"), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    job = _SharedJob(job_id)
+    job.status = data["status"]
+    job.refined_reson = data["refined_reson"]
+    job.refined_trans_text = data["refined_trans_text"]
+    return job
+
+
+def _purge():
+    # 끝난 뒤 GEMINI_JOB_TTL초가 지난 작업은 정리
+    global _last_shared_purge
+    now = time.monotonic()
+    expired = [job_id for job_id, job in _jobs.items() if job.finished is not None and now - job.finished > config.gemini_job_ttl]
+    for job_id in expired:
+        del _jobs[job_id]
+
+    # 공유 파일은 수정 시각 기준으로 가끔 한번씩 정리
+    if config.workers > 1 and now - _last_shared_purge > 60:
+        _last_shared_purge = now
+        cutoff = time.time() - config.gemini_job_ttl
+        try:
+            for entry in os.scandir(_shared_dir()):
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def create(translated_text: str, text1: str, text2: str = None, on_done=None) -> GeminiJob:
+    job = GeminiJob(uuid.uuid4().hex)
+    with _lock:
+        _purge()
+        _jobs[job.job_id] = job
+    _share(job)
+
+    def finish(future):
+        try:
+            refined_reson, refined_trans_text = future.result()
+        except Exception as e:
+            error("Gemini 다듬기 작업 실패", e, ErrorCode.GEMINI_API_ERROR)
+            job.complete("error", "[API 호출 실패]", "[API 호출 실패]")
+            return
+
+        failed = refined_reson in ERROR_TEXTS or refined_trans_text in ERROR_TEXTS
+        job.complete("error" if failed else "done", refined_reson, refined_trans_text)
+        debug(f"Gemini 다듬기 작업 완료 : {job.job_id} ({job.status})")
+        if not failed and on_done is not None:
+            on_done(refined_reson, refined_trans_text)
+
+    submit_refinement(translated_text, text1, text2).add_done_callback(finish)
+    return job
+
+
+def get(job_id: str) -> GeminiJob | None:
+    with _lock:
+        job = _jobs.get(job_id)
+    return job if job is not None else _load_shared(job_id)
+
+
+def pending_count() -> int:
+    with _lock:
+        return sum(1 for job in _jobs.values() if job.status == "pending")
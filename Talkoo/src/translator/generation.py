@@ -0,0 +1,119 @@
+import threading
+import time
+import config
+from translator import batch_scheduler, languages, translation_memory
+from translator.backends import get_backend, model_identity
+from translator.segmenter import split_text, join_text
+from utils import metrics, profiling
+from utils.logger import debug
+
+
+def run_generate(texts: list[str], tokenizer, base_model, actual_device,
+                 langs: tuple[str, str] | None = None) -> list[str]:
+    # 여러 문장을 패딩해서 한번의 generate로 번역 (실제 추론은 INFERENCE_BACKEND로 정한 백엔드가 맡는다)
+    return get_backend(tokenizer, base_model, actual_device).translate(texts, langs)
+
+
+def generate_translations(texts: list[str], tokenizer, base_model, actual_device,
+                          langs: tuple[str, str] | None = None) -> list[str]:
+    # 긴 입력은 512 토큰에서 잘리지 않도록 문장 단위 조각으로 나눠 한 배치로 번역한 뒤 문단 구조대로 다시 합친다
+    # langs = (src_lang, tgt_lang), None이면 설정값
+    # 단계별 소요 시간은 metrics.observe_stage로 남긴다 (요청별 기록은 metrics.request_timings)
+    langs = languages.resolve(langs)
+    start = time.perf_counter()
+    chunks = []
+    layouts = []
+    for text in texts:
+        # 번역 메모리를 쓸 때는 문장 단위로 나눠야 일부만 바뀐 문서에서 재사용률이 높다
+        text_chunks, layout = split_text(text, tokenizer, config.segment_max_tokens, merge=not config.translation_memory)
+        chunks.extend(text_chunks)
+        layouts.append((len(text_chunks), layout))
+    metrics.observe_stage("segment", time.perf_counter() - start)
+
+    if config.translation_memory:
+        translated_chunks = _translate_with_memory(chunks, tokenizer, base_model, actual_device, langs)
+    else:
+        translated_chunks = _translate_chunks(chunks, tokenizer, base_model, actual_device, langs) if chunks else []
+
+    translations = []
+    offset = 0
+    for count, layout in layouts:
+        translations.append(join_text(translated_chunks[offset:offset + count], layout))
+        offset += count
+    return translations
+
+
+def _translate_with_memory(chunks: list[str], tokenizer, base_model, actual_device,
+                           langs: tuple[str, str]) -> list[str]:
+    # 이미 번역한 적 있는 문장은 번역 메모리에서 가져오고, 처음 보는 문장만 모델로 보낸다
+    model_id = model_identity(base_model)
+    keys = [translation_memory.make_key(chunk, model_id, langs) for chunk in chunks]
+    results = [translation_memory.lookup(key) for key in keys]
+
+    missing = {}
+    for index, (key, result) in enumerate(zip(keys, results)):
+        if result is None:
+            missing.setdefault(key, []).append(index)
+
+    debug(f"번역 메모리 : 적중 {len(chunks) - sum(len(indexes) for indexes in missing.values())}, 새로 번역 {len(missing)}")
+
+    if missing:
+        missing_chunks = [chunks[indexes[0]] for indexes in missing.values()]
+        translated = _translate_chunks(missing_chunks, tokenizer, base_model, actual_device, langs)
+        for (key, indexes), translation in zip(missing.items(), translated):
+            translation_memory.store(key, translation)
+            for index in indexes:
+                results[index] = translation
+    return results
+
+
+def _translate_chunks(chunks: list[str], tokenizer, base_model, actual_device,
+                      langs: tuple[str, str]) -> list[str]:
+    # 마이크로 배치 스케줄러가 같은 모델로 동작 중이면 같은 언어쌍의 다른 요청과 묶어서 처리
+    # 프로파일 중인 요청은 스케줄러 스레드로 넘기면 잡히지 않으므로 직접 돌린다
+    scheduler = batch_scheduler.get_scheduler(base_model)
+    if scheduler is not None and not profiling.active():
+        # 대기 시간(queue_wait)과 배치의 단계 시간은 스케줄러가 이 요청의 기록에 더해준다
+        return scheduler.translate(chunks, langs)
+
+    return run_generate(chunks, tokenizer, base_model, actual_device, langs)
+
+
+def stream_generate(text: str, tokenizer, base_model, actual_device, stop_event: threading.Event,
+                    langs: tuple[str, str] | None = None):
+    # 한 조각을 번역하면서 만들어지는 토큰을 문자열 조각으로 바로 내보낸다
+    yield from get_backend(tokenizer, base_model, actual_device).stream(text, stop_event, langs)
+
+
+def stream_translation(text: str, tokenizer, base_model, actual_device, langs: tuple[str, str] | None = None):
+    # generate_translations와 같은 조각 나누기/번역 메모리/문단 복원을 따르되 결과를 조각 단위로 흘려보낸다
+    # 이어 붙인 결과는 generate_translations([text])[0] 과 같은 모양이 된다
+    # 토큰 단위로 흘려보내야 하므로 마이크로 배치 스케줄러를 거치지 않고 조각마다 따로 generate 한다
+    langs = languages.resolve(langs)
+    stop_event = threading.Event()
+    model_id = model_identity(base_model)
+    chunks, layout = split_text(text, tokenizer, config.segment_max_tokens, merge=not config.translation_memory)
+    offset = 0
+    try:
+        for item in layout:
+            if isinstance(item, str):
+                yield item
+                continue
+            for index, chunk in enumerate(chunks[offset:offset + item]):
+                if index:
+                    yield " "
+                key = translation_memory.make_key(chunk, model_id, langs) if config.translation_memory else None
+                translation = translation_memory.lookup(key) if key is not None else None
+                if translation is not None:
+                    yield translation
+                    continue
+
+                pieces = []
+                for piece in stream_generate(chunk, tokenizer, base_model, actual_device, stop_event, langs):
+                    pieces.append(piece)
+                    yield piece
+                if key is not None:
+                    translation_memory.store(key, "".join(pieces))
+            offset += item
+    finally:
+        stop_event.set()
@@ -0,0 +1,56 @@
+import torch
+import config
+
+# 요청마다 언어쌍을 다르게 쓸 수 있도록 언어쌍은 (src_lang, tgt_lang) 튜플로 넘긴다. None = 설정값(SRC_LANG/TGT_LANG)
+# 여러 요청이 같은 tokenizer를 동시에 쓰므로 tokenizer.src_lang을 바꾸지 않고 언어 토큰을 직접 붙여 입력을 만든다
+
+
+def resolve(langs: tuple[str, str] | None) -> tuple[str, str]:
+    return langs if langs is not None else (config.src_lang, config.tgt_lang)
+
+
+def lang_pair(src_lang: str | None = None, tgt_lang: str | None = None) -> tuple[str, str]:
+    return src_lang or config.src_lang, tgt_lang or config.tgt_lang
+
+
+def is_default(langs: tuple[str, str] | None) -> bool:
+    return resolve(langs) == (config.src_lang, config.tgt_lang)
+
+
+def is_supported(tokenizer, code: str) -> bool:
+    # NLLB 언어 코드(eng_Latn, jpn_Jpan ...)는 tokenizer의 특수 토큰으로 등록되어 있다
+    token_id = tokenizer.convert_tokens_to_ids(code)
+    return token_id is not None and token_id != tokenizer.unk_token_id
+
+
+def check_pair(tokenizer, langs: tuple[str, str]) -> str | None:
+    # 지원하지 않는 언어 코드가 있으면 오류 메시지, 문제 없으면 None
+    unknown = [code for code in langs if not is_supported(tokenizer, code)]
+    if unknown:
+        return f"지원하지 않는 언어 코드: {', '.join(unknown)}"
+    return None
+
+
+def encode_ids(tokenizer, texts: list[str], src_lang: str, max_length: int = 512) -> list[list[int]]:
+    # tokenizer 호출 옵션을 항상 같게 유지해야 fast tokenizer 내부 설정(truncation/padding)이 바뀌지 않아 스레드 간 충돌이 없다
+    # 그래서 자르기와 특수 토큰 붙이기는 여기서 직접 한다 (NLLB: [src_lang] 토큰들 [eos], 예전 방식은 토큰들 [eos] [src_lang])
+    rows = tokenizer(texts, add_special_tokens=False)["input_ids"]
+    lang_id = tokenizer.convert_tokens_to_ids(src_lang)
+    eos_id = tokenizer.eos_token_id
+    keep = max_length - 2
+    if getattr(tokenizer, "legacy_behaviour", False):
+        return [row[:keep] + [eos_id, lang_id] for row in rows]
+    return [[lang_id] + row[:keep] + [eos_id] for row in rows]
+
+
+def pad_ids(tokenizer, rows: list[list[int]], actual_device) -> dict:
+    width = max((len(row) for row in rows), default=0)
+    pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+    input_ids = torch.full((len(rows), width), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+    left = tokenizer.padding_side == "left"
+    for index, row in enumerate(rows):
+        span = slice(width - len(row), width) if left else slice(0, len(row))
+        input_ids[index, span] = torch.tensor(row, dtype=torch.long)
+        attention_mask[index, span] = 1
+    return {"input_ids": input_ids.to(actual_device), "attention_mask": attention_mask.to(actual_device)}
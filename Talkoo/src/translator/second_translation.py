@@ -1,81 +1,79 @@
-import torch
 import re
-from thefuzz import process, fuzz
+import time
+from utils import metrics
 from utils.logger import debug, info, error
 from utils.error_codes import ErrorCode
-from customDICT.tkdic_paser import parse_tkdic
+from customDICT.dict_registry import get_dictionary
+from translator.generation import generate_translations
 import config
 
-def tkdic_start(text: str, tk_path: str, tk_select: str):
-    placeholder_map = {}
-    placeholder_index = 0
-    processed_text = text
+PLACEHOLDER_PREFIX = "TkdicoTranslate"
+_PLACEHOLDER_PATTERN = re.compile(PLACEHOLDER_PREFIX + r"(\d+)", re.IGNORECASE)
+
 
+def tkdic_start(text: str, tk_path: str, tk_select: str):
+    start = time.perf_counter()
     try:
         if tk_select is None:
             return text, {}
 
-        main_fuzzy, base_dict = parse_tkdic(f"{tk_path}/{tk_select}")
-        if not base_dict:
+        dictionary = get_dictionary(f"{tk_path}/{tk_select}")
+        if not dictionary.term_count:
             return text, {}
 
-        text_lower = processed_text.lower()
-        text_words_clean = [word.strip('.,?!').lower() for word in processed_text.split()]
+        matched_terms = {}
+        for term in dictionary.index.match(text):
+            # 같은 단어가 여러번 등록되어 있으면 먼저 나온 항목을 사용
+            matched_terms.setdefault(term.word_lower, term)
+        if not matched_terms:
+            return text, {}
 
-        for entry in base_dict:
-            final_fuzzy_score = entry.get('fuzzy', main_fuzzy)
-            custom_word_orig = entry.get('word', '').strip()
-            custom_word_clean = custom_word_orig.lower()
-            is_phrase = len(custom_word_clean.split()) > 1
+        # 일치한 용어 전체를 하나의 정규식으로 묶어 한번에 치환, 겹치는 경우 긴 용어 우선
+        words = sorted(matched_terms.values(), key=lambda term: len(term.word), reverse=True)
+        pattern = re.compile(r'\b(?:' + '|'.join(re.escape(term.word) for term in words) + r')\b', re.IGNORECASE)
 
-            found = False
-            if is_phrase:
-                score = fuzz.partial_ratio(custom_word_clean, text_lower)
-                if score >= final_fuzzy_score:
-                    found = True
-            else:
-                match = process.extractOne(custom_word_clean, text_words_clean)
-                if match and match[1] >= final_fuzzy_score:
-                    found = True
-            
-            if found:
-                placeholder_index += 1
-                if placeholder_index > 99:
-                    break
-                
-                placeholder = f"TkdicoTranslate{placeholder_index}"
-                pattern = r'\b' + re.escape(custom_word_orig) + r'\b'
-                processed_text = re.sub(pattern, placeholder, processed_text, flags=re.IGNORECASE)
-                
-                placeholder_map[placeholder] = entry.get('kor', '')
-        
+        placeholder_map = {}
+        placeholders = {}
+
+        def replace(match):
+            term = matched_terms.get(match.group(0).lower())
+            if term is None:
+                return match.group(0)
+            placeholder = placeholders.get(term.word_lower)
+            if placeholder is None:
+                placeholder = f"{PLACEHOLDER_PREFIX}{len(placeholders) + 1}"
+                placeholders[term.word_lower] = placeholder
+                placeholder_map[placeholder] = term.kor
+            return placeholder
+
+        processed_text = pattern.sub(replace, text)
         return processed_text, placeholder_map
 
     except Exception as e:
         error(f"tkdic_start 처리 중 오류 발생", e, ErrorCode.TKDIC_PROCESS_ERROR)
         return text, {}
+    finally:
+        metrics.observe_stage("glossary_match", time.perf_counter() - start)
 
 def post_processing(translated_text: str, placeholder_map: dict) -> str:
-    final_text = translated_text
-    for placeholder, original_word in placeholder_map.items():
-        final_text = final_text.replace(placeholder, original_word)
-    return final_text
+    if not placeholder_map:
+        return translated_text
+    # 자리표시자를 한번에 복원 (TkdicoTranslate1 이 TkdicoTranslate10 의 앞부분을 바꾸는 문제 방지)
+    return _PLACEHOLDER_PATTERN.sub(
+        lambda match: placeholder_map.get(f"{PLACEHOLDER_PREFIX}{match.group(1)}", match.group(0)),
+        translated_text
+    )
 
-def second_translation(translate_text: str, tk_path: str, tk_select: str, tokenizer, base_model, actual_device):
+def second_translation(translate_text: str, tk_path: str, tk_select: str, tokenizer, base_model, actual_device,
+                       langs: tuple[str, str] | None = None, plain_translation: str | None = None):
+    # plain_translation: 이미 끝난 기본 번역 결과. 사전에서 치환한 용어가 없으면 다시 번역하지 않고 그대로 쓴다 (batch_translation과 같은 규칙)
     try:
         preprocessed_text, placeholder_map = tkdic_start(translate_text, tk_path, tk_select)
         
-        tokenizer.src_lang = config.src_lang
-        inputs = tokenizer(preprocessed_text, return_tensors="pt", max_length=512, truncation=True).to(actual_device)
-        
-        with torch.no_grad():
-            generated_tokens = base_model.generate(
-                **inputs,
-                forced_bos_token_id=tokenizer.convert_tokens_to_ids(config.tgt_lang),
-                max_length=512
-            )
-        
-        translated_by_model = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
+        if plain_translation is not None and preprocessed_text == translate_text:
+            translated_by_model = plain_translation
+        else:
+            translated_by_model = generate_translations([preprocessed_text], tokenizer, base_model, actual_device, langs=langs)[0]
         
         debug(f"NLLB 번역 결과 (후처리 전): {translated_by_model}")
 
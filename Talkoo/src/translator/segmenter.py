@@ -0,0 +1,80 @@
+import re
+
+# 줄바꿈은 문단 구분자로 보고 원문 그대로 보존
+_PARAGRAPH_SPLIT = re.compile(r"(\n+)")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。！？])\s+")
+_CLAUSE_SPLIT = re.compile(r"(?<=[,;:、，])\s+")
+
+
+def _count_tokens(text: str, tokenizer) -> int:
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def _split_long(piece: str, tokenizer, max_tokens: int) -> list[str]:
+    # 한 문장이 예산을 넘으면 쉼표 단위 → 단어 단위로 더 잘게 자른다
+    for splitter in (_CLAUSE_SPLIT, None):
+        parts = splitter.split(piece) if splitter else piece.split()
+        if len(parts) > 1:
+            return _pack(parts, tokenizer, max_tokens, splitter is None)
+    # 공백 없는 긴 토큰 덩어리는 더 자를 방법이 없으므로 그대로 둔다
+    return [piece]
+
+
+def _pack(pieces: list[str], tokenizer, max_tokens: int, last_resort: bool = False, merge: bool = True) -> list[str]:
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece in pieces:
+        tokens = _count_tokens(piece, tokenizer)
+        if tokens > max_tokens and not last_resort:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_long(piece, tokenizer, max_tokens))
+            continue
+        if current and (not merge or current_tokens + tokens > max_tokens):
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def split_text(text: str, tokenizer, max_tokens: int, merge: bool = True) -> tuple[list[str], list]:
+    # 번역할 조각 목록과, 번역 결과를 원래 문단 구조로 되돌리기 위한 layout을 반환
+    # layout 항목: str = 그대로 붙일 구분자/공백, int = 이어 붙일 번역 조각 수
+    # merge=False 이면 짧은 문장들을 하나로 합치지 않고 문장마다 조각을 만든다
+    chunks = []
+    layout = []
+    for index, part in enumerate(_PARAGRAPH_SPLIT.split(text)):
+        stripped = part.strip()
+        if index % 2 == 1 or not stripped:
+            if part:
+                layout.append(part)
+            continue
+
+        leading = part[:len(part) - len(part.lstrip())]
+        trailing = part[len(part.rstrip()):]
+        paragraph_chunks = _pack(_SENTENCE_SPLIT.split(stripped), tokenizer, max_tokens, merge=merge)
+
+        if leading:
+            layout.append(leading)
+        layout.append(len(paragraph_chunks))
+        if trailing:
+            layout.append(trailing)
+        chunks.extend(paragraph_chunks)
+    return chunks, layout
+
+
+def join_text(translations: list[str], layout: list) -> str:
+    result = []
+    offset = 0
+    for item in layout:
+        if isinstance(item, str):
+            result.append(item)
+        else:
+            result.append(" ".join(translations[offset:offset + item]))
+            offset += item
+    return "".join(result)
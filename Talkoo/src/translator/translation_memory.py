@@ -0,0 +1,41 @@
+import hashlib
+import config
+from utils.cache_store import TwoTierCache
+
+_memory: TwoTierCache | None = None
+
+
+def get_memory() -> TwoTierCache:
+    global _memory
+    if _memory is None:
+        _memory = TwoTierCache("translation_memory", config.cache_path, config.tm_memory_size, config.tm_disk_size)
+    return _memory
+
+
+def normalize_segment(segment: str) -> str:
+    return " ".join(segment.split())
+
+
+def make_key(segment: str, model_id: str, langs: tuple[str, str] | None = None) -> str:
+    # 문장 조각 번역은 (조각, 언어쌍, 모델)만으로 결정되므로 사전과 무관하게 재사용 가능
+    # model_id = backends.model_identity(base_model): 이름/백엔드/정밀도를 결과를 만든 모델 기준으로
+    src_lang, tgt_lang = langs if langs is not None else (config.src_lang, config.tgt_lang)
+    raw = "\x1f".join((normalize_segment(segment), src_lang, tgt_lang, model_id))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(key: str) -> str | None:
+    return get_memory().get(key)
+
+
+def store(key: str, translation: str):
+    if translation:
+        get_memory().set(key, translation)
+
+
+def invalidate():
+    get_memory().clear()
+
+
+def stats() -> dict:
+    return get_memory().stats()
@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from utils.logger import error, info
+from utils.error_codes import ErrorCode
+
+
+class TwoTierCache:
+    # 메모리 LRU + 디스크(sqlite) 2단 캐시. 값은 JSON으로 직렬화 가능한 객체여야 한다.
+    def __init__(self, name: str, dir_path: str, memory_size: int, disk_size: int):
+        self.name = name
+        self.memory_size = max(0, memory_size)
+        self.disk_size = max(0, disk_size)
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        self._writes_since_trim = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_size > 0:
+            try:
+                os.makedirs(dir_path, exist_ok=True)
+                self._disk = sqlite3.connect(os.path.join(dir_path, f"{name}.sqlite3"), check_same_thread=False)
+                self._disk.execute("PRAGMA journal_mode=WAL")
+                self._disk.execute(
+                    "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed REAL NOT NULL)"
+                )
+                self._disk.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+                self._disk.commit()
+                info(f"{name} 디스크 캐시 로드 완료 ({self._disk_count()}개)")
+            except Exception as e:
+                error(f"{name} 디스크 캐시 열기 실패, 메모리 캐시만 사용합니다.", e, ErrorCode.CACHE_ERROR)
+                self._disk = None
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+            value = None
+            if self._disk is not None:
+                try:
+                    row = self._disk.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        value = json.loads(row[0])
+                        self._disk.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+                        self._disk.commit()
+                except Exception as e:
+                    error(f"{self.name} 디스크 캐시 조회 실패", e, ErrorCode.CACHE_ERROR)
+
+            if value is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._remember(key, value)
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._disk is None:
+                return
+            try:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, accessed) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), time.time())
+                )
+                self._writes_since_trim += 1
+                # 매 저장마다 개수를 세지 않고 일정 횟수마다 오래된 항목을 정리
+                if self._writes_since_trim >= max(1, self.disk_size // 100):
+                    self._trim_disk()
+                self._disk.commit()
+            except Exception as e:
+                error(f"{self.name} 디스크 캐시 저장 실패", e, ErrorCode.CACHE_ERROR)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                try:
+                    self._disk.execute("DELETE FROM entries")
+                    self._disk.commit()
+                except Exception as e:
+                    error(f"{self.name} 디스크 캐시 삭제 실패", e, ErrorCode.CACHE_ERROR)
+            info(f"{self.name} 캐시를 비웠습니다.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_count(),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def lookup_counts(self) -> dict:
+        # 조회 결과 수만 돌려준다 (디스크 항목 수를 세지 않아 /metrics 에서 자주 불러도 가볍다)
+        with self._lock:
+            return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def _remember(self, key: str, value):
+        if self.memory_size == 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _trim_disk(self):
+        self._writes_since_trim = 0
+        overflow = self._disk_count() - self.disk_size
+        if overflow > 0:
+            self._disk.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed LIMIT ?)",
+                (overflow,)
+            )
+
+    def _disk_count(self) -> int:
+        if self._disk is None:
+            return 0
+        try:
+            return self._disk.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except Exception:
+            return 0
@@ -11,4 +11,5 @@ class ErrorCode(IntEnum):
     AUTO_DEVICE_MAP_FAIL = 12  # Auto device_map 로드 실패
     TKDIC_NOT_FOUND = 20  # 선택한 사전이 존재하지 않음
     TKDIC_PROCESS_ERROR = 21  # tkdic 처리 중 오류
-    TRANSLATION_FAILED = 23  # 번역 실패
\ No newline at end of file
+    TRANSLATION_FAILED = 23  # 번역 실패
+    CACHE_ERROR = 30  # 번역 캐시 처리 중 오류
\ No newline at end of file
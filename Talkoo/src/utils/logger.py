@@ -1,70 +1,173 @@
-import datetime, os, inspect
+import atexit, datetime, os, queue, sys, threading
 from colorama import Fore, Style
 import config
 
 # ─── ① 프로그램 시작 시각으로 Crash 로그 파일명 생성 ───
 _run_start = datetime.datetime.now()
-_crash_logfile = os.path.join(
-    config.log_path,
-    f"CrashHandler-{_run_start.strftime('%Y-%m-%d_%H-%M-%S')}.log"
-)
+_crash_filename = f"CrashHandler-{_run_start.strftime('%Y-%m-%d_%H-%M-%S')}.log"
+
+# ─── ② 로그는 큐에 넣고 백그라운드 스레드가 모아서 기록 ───
+_ERROR, _DEBUG, _INFO = 1, 2, 3
+_BATCH_SIZE = 256
+_STOP = object()
+
+_queue = queue.SimpleQueue()
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
 
 def _caller_info():
-    frame = inspect.currentframe().f_back.f_back
-    filename = os.path.basename(frame.f_code.co_filename)
-    lineno   = frame.f_lineno
-    return filename, lineno
+    # _enqueue → info/debug/error → 호출한 곳
+    frame = sys._getframe(3)
+    return os.path.basename(frame.f_code.co_filename), frame.f_lineno
 
 def _format_text(text):
     if isinstance(text, list):
         return " ".join(str(x) for x in text)
     return str(text)
 
-def insert_log(text, type):  # 1=error, 2=debug, 3=info
-    os.makedirs(config.log_path, exist_ok=True)
-
-    if type == 1:
-        full_path = _crash_logfile
-    elif type == 2:
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
-        full_path = os.path.join(config.log_path, f"Debug-{today}.log")
-    elif type == 3:
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
-        full_path = os.path.join(config.log_path, f"{today}.log")
-    else:
+
+class _LogWriter:
+    # 로그 파일 핸들을 열어둔 채로 재사용하고, 날짜가 바뀌면 새 파일로 교체
+    def __init__(self):
+        self.handles = {}
+
+    def _path(self, type, now):
+        if type == _ERROR:
+            return os.path.join(config.log_path, _crash_filename)
+        today = now.strftime("%Y-%m-%d")
+        if type == _DEBUG:
+            return os.path.join(config.log_path, f"Debug-{today}.log")
+        if type == _INFO:
+            return os.path.join(config.log_path, f"{today}.log")
         raise ValueError("Unknown log type")
 
-    if type == 1 or not os.path.exists(full_path):
-        if config.debug_mod:
-            print(f"로그 파일 미확인, 생성: {full_path}")
-        with open(full_path, 'a', encoding='utf-8'):
-            pass
+    def _handle(self, type, now):
+        path = self._path(type, now)
+        current = self.handles.get(type)
+        if current is not None and current.name == path:
+            return current
+        if current is not None:
+            current.close()
 
-    with open(full_path, 'a', encoding='utf-8') as f:
-        f.write(text + "\n")
+        os.makedirs(config.log_path, exist_ok=True)
+        if not os.path.exists(path) and config.debug_mod:
+            print(f"로그 파일 미확인, 생성: {path}")
+        handle = open(path, 'a', encoding='utf-8')
+        self.handles[type] = handle
+        return handle
 
-def error(text, e, code):
+    def write(self, records):
+        console = []
+        touched = set()
+        for type, now, level, location, text, color, suffix, notice in records:
+            if level is None:
+                line = text
+            else:
+                stamp = now.strftime("%Y-%m-%d %H:%M:%S")
+                line = f"{level} {stamp} {location} {text}{suffix}"
+                console.append(f"{level} {stamp} {location} {color}{text}{Style.RESET_ALL}{suffix}{notice}")
+            try:
+                handle = self._handle(type, now)
+                handle.write(line + "\n")
+                touched.add(handle)
+            except OSError as e:
+                console.append(f"로그 파일 기록 실패: {e}")
+        if console:
+            print("\n".join(console), flush=True)
+        for handle in touched:
+            handle.flush()
+
+    def close(self):
+        for handle in self.handles.values():
+            handle.close()
+        self.handles.clear()
+
+
+def _run():
+    writer = _LogWriter()
+    running = True
+    while running:
+        records = [_queue.get()]
+        # 쌓여 있는 로그를 한번에 모아 기록하고 flush는 배치마다 한번만
+        while len(records) < _BATCH_SIZE:
+            try:
+                records.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        if _STOP in records:
+            running = False
+            records = [record for record in records if record is not _STOP]
+        if records:
+            try:
+                writer.write(records)
+            except Exception as e:
+                print(f"로그 기록 실패: {e}", file=sys.stderr)
+    writer.close()
+
+
+def _ensure_writer():
+    global _writer, _writer_pid
+    # fork 된 자식 프로세스에는 부모의 기록 스레드가 없으므로 pid로 확인
+    if _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer_pid == os.getpid():
+            return
+        _writer = threading.Thread(target=_run, name="talkoo-logger", daemon=True)
+        _writer.start()
+        _writer_pid = os.getpid()
+
+
+def _enqueue(type, level, text, color, suffix="", notice=""):
     fn, ln = _caller_info()
-    text = _format_text(text)
-    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _ensure_writer()
+    _queue.put((type, datetime.datetime.now(), level, f"{fn}, line:{ln}", text, color, suffix, notice))
+
+
+def shutdown(timeout=5.0):
+    # 큐에 남은 로그를 모두 기록하고 기록 스레드를 종료
+    global _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        return
+    _queue.put(_STOP)
+    _writer.join(timeout)
+    _writer_pid = None
+
+atexit.register(shutdown)
+
+
+def _reset_after_fork():
+    # 자식 프로세스는 부모 큐에 남은 로그를 다시 쓰지 않도록 큐와 잠금을 새로 만든다
+    global _queue, _writer, _writer_pid, _writer_lock
+    _queue = queue.SimpleQueue()
+    _writer = None
+    _writer_pid = None
+    _writer_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def insert_log(text, type):  # 1=error, 2=debug, 3=info
+    if type not in (_ERROR, _DEBUG, _INFO):
+        raise ValueError("Unknown log type")
+    _ensure_writer()
+    _queue.put((type, datetime.datetime.now(), None, "", text, "", "", ""))
+
+def error(text, e, code):
     # prefix는 기본 색상, text 부분만 RED
-    print(f"[Error] {now} {fn}, line:{ln} {Fore.RED}{text} {e} {Style.RESET_ALL}\nError codeㅣ오류 코드 : {code}")
-    print("해당 오류 관련 로그 CrashHandler가 생성되었습니다.\n문의는 해당 오류의 CrashHandler를 제출하여 주시면 빠른 처리가 가능합니다.")
-    insert_log(f"[Error] {now} {fn}, line:{ln} {text} {e}\nError codeㅣ오류 코드 : {code}", 1)
+    _enqueue(_ERROR, "[Error]", f"{_format_text(text)} {e}", Fore.RED, f"\nError codeㅣ오류 코드 : {code}",
+             "\n해당 오류 관련 로그 CrashHandler가 생성되었습니다.\n문의는 해당 오류의 CrashHandler를 제출하여 주시면 빠른 처리가 가능합니다.")
 
 def debug(text):
-    if config.debug_mod:
-        fn, ln = _caller_info()
-        text = _format_text(text)
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # text 부분만 GREEN
-        print(f"[Debug] {now} {fn}, line:{ln} {Fore.GREEN}{text}{Style.RESET_ALL}")
-        insert_log(f"[Debug] {now} {fn}, line:{ln} {text}", 2)
+    # 디버그 모드가 아니면 호출 위치 확인/문자열 변환도 하지 않음
+    if not config.debug_mod:
+        return
+    # text 부분만 GREEN
+    _enqueue(_DEBUG, "[Debug]", _format_text(text), Fore.GREEN)
 
 def info(text):
-    fn, ln = _caller_info()
-    text = _format_text(text)
-    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     # text 부분만 CYAN
-    print(f"[Info]  {now} {fn}, line:{ln} {Fore.CYAN}{text}{Style.RESET_ALL}")
-    insert_log(f"[Info]  {now} {fn}, line:{ln} {text}", 3)
\ No newline at end of file
+    _enqueue(_INFO, "[Info] ", _format_text(text), Fore.CYAN)
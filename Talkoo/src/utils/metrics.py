@@ -0,0 +1,239 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from utils.logger import debug
+
+# /metrics 로 내보내는 Prometheus 메트릭 (text 형식 0.0.4, prometheus_client 없이 직접 집계)
+# inc/observe는 잠금 한번 + 덧셈이라 운영 중에 계속 켜둬도 부담이 적다
+# 모델/캐시 상태처럼 이미 다른 곳에서 세고 있는 값은 수집할 때 읽어온다 (collect 함수)
+# 멀티 워커(WORKERS > 1)에서는 워커마다 따로 집계되므로 응답은 요청을 받은 워커 하나의 값이다
+# 단계 시간은 요청별 기록(request_timings)에도 같이 더해져 /translate/?timings=true 응답에 쓰인다
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+# 지금 요청의 단계별 누적 시간(초). 다른 스레드에서 이어 기록할 때는 bind_timings / add_timing
+_request_timings: ContextVar[dict | None] = ContextVar("talkoo_request_timings", default=None)
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = (), collect=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        # collect: 수집 시점에 {라벨 값 튜플: 값}을 돌려주는 함수
+        self.collect = collect
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _samples(self) -> dict:
+        if self.collect is not None:
+            return self.collect()
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in sorted(self._samples().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, labels: tuple = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, labels: tuple = ()):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount: float = 1, labels: tuple = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, labels: tuple = ()):
+        self.inc(-amount, labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: tuple = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [버킷별 개수(마지막 = +Inf), 합계]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            states = {values: (list(state[0]), state[1]) for values, state in self._values.items()}
+        for values, (counts, total) in sorted(states.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+def _model_pool_values(field: str) -> dict:
+    import model_manager
+    return {(member["model"],): member[field] or 0 for member in model_manager.status()["pool"]}
+
+
+def _model_status_value(field: str) -> dict:
+    import model_manager
+    value = model_manager.status()[field]
+    return {(): value} if value is not None else {}
+
+
+def _model_ready() -> dict:
+    import model_manager
+    return {(): 1 if model_manager.status()["status"] == "ready" else 0}
+
+
+def _cache_counts() -> dict:
+    # 꺼져 있는 캐시는 만들지 않는다 (통계를 읽으려고 디스크 캐시를 열지 않도록)
+    import config
+    import translation_cache
+    from translator import gemini_cache, translation_memory
+
+    caches = (
+        ("translation", config.cache_enabled, translation_cache.get_cache),
+        ("translation_memory", config.translation_memory, translation_memory.get_memory),
+        ("gemini", config.gemini_cache, gemini_cache.get_cache),
+    )
+    return {name: get_cache().lookup_counts() for name, enabled, get_cache in caches if enabled}
+
+
+def _cache_lookups() -> dict:
+    values = {}
+    for name, counts in _cache_counts().items():
+        values[(name, "memory_hit")] = counts["memory_hits"]
+        values[(name, "disk_hit")] = counts["disk_hits"]
+        values[(name, "miss")] = counts["misses"]
+    return values
+
+
+def _cache_hit_ratio() -> dict:
+    values = {}
+    for name, counts in _cache_counts().items():
+        hits = counts["memory_hits"] + counts["disk_hits"]
+        lookups = hits + counts["misses"]
+        values[(name,)] = hits / lookups if lookups else 0
+    return values
+
+
+REQUESTS = Counter("talkoo_requests_total", "HTTP 요청 수", ("endpoint", "method", "status"))
+REQUEST_SECONDS = Histogram("talkoo_request_duration_seconds", "HTTP 요청 처리 시간 (스트리밍 응답은 첫 응답까지)", ("endpoint",))
+IN_FLIGHT = Gauge("talkoo_requests_in_flight", "처리 중인 HTTP 요청 수")
+STAGE_SECONDS = Histogram("talkoo_stage_duration_seconds", "번역 단계별 소요 시간", ("stage",))
+TOKENS = Counter("talkoo_tokens_total", "모델 입력(in)/출력(out) 토큰 수", ("direction",))
+MODEL_IN_FLIGHT = Gauge("talkoo_model_in_flight", "모델별 처리 중인 번역 요청 수", ("model",), collect=lambda: _model_pool_values("in_flight"))
+QUEUE_DEPTH = Gauge("talkoo_queue_depth", "모델별 마이크로 배치 대기열 길이", ("model",), collect=lambda: _model_pool_values("queue_depth"))
+MODEL_LOAD_SECONDS = Gauge("talkoo_model_load_seconds", "마지막 모델 로드 시간", collect=lambda: _model_status_value("load_seconds"))
+MODEL_WARMUP_SECONDS = Gauge("talkoo_model_warmup_seconds", "마지막 모델 워밍업 시간", collect=lambda: _model_status_value("warmup_seconds"))
+MODEL_READY = Gauge("talkoo_model_ready", "모델 준비 여부 (1 = 번역 가능)", collect=_model_ready)
+CACHE_LOOKUPS = Counter("talkoo_cache_lookups_total", "캐시 조회 결과", ("cache", "result"), collect=_cache_lookups)
+CACHE_HIT_RATIO = Gauge("talkoo_cache_hit_ratio", "캐시 적중률 (시작 후 누적)", ("cache",), collect=_cache_hit_ratio)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, (stage,))
+    add_timing(_request_timings.get(), stage, seconds)
+
+
+def add_timing(timings: dict | None, stage: str, seconds: float):
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def current_timings() -> dict | None:
+    return _request_timings.get()
+
+
+def bind_timings(timings: dict | None):
+    # 요청 스레드에서 넘겨받은 기록을 지금 컨텍스트(다른 스레드/태스크)에서 이어 쓴다
+    _request_timings.set(timings)
+
+
+@contextmanager
+def request_timings():
+    # 블록 안에서 같은 컨텍스트로 기록된 단계 시간을 모은다 {단계: 초}
+    # 겹쳐 쓰면 안쪽 기록은 끝날 때 바깥 기록에도 더해진다 (요청 전체 기록이 빠지지 않도록)
+    parent = _request_timings.get()
+    timings = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+        for stage, seconds in timings.items():
+            add_timing(parent, stage, seconds)
+
+
+def timings_ms(timings: dict) -> dict[str, float]:
+    # 로그/응답용 {단계: ms}
+    return {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}
+
+
+@contextmanager
+def stage(name: str):
+    # with metrics.stage("glossary_match"): ... 형태로 단계 시간을 잰다
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            # 상태를 읽지 못한 항목은 건너뛰고 나머지는 내보낸다
+            debug(f"메트릭 수집 실패 : {metric.name} {e}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,79 @@
+import cProfile
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+import config
+from utils.logger import info
+
+# 느린 요청 하나를 골라 프로파일을 떠서 log/profiles 아래에 저장한다 (관리자 전용, /translate/?profile=torch|cprofile)
+# torch: torch.profiler 크롬 트레이스(.json, chrome://tracing 또는 Perfetto로 열기)
+# cprofile: 파이썬 함수 단위 통계(.prof, python -m pstats 또는 snakeviz로 열기)
+# 프로파일러는 프로세스에 하나만 켤 수 있으므로 동시에 두 요청을 잡지 않는다
+
+PROFILERS = ("torch", "cprofile")
+
+_lock = threading.Lock()
+_active: ContextVar[bool] = ContextVar("talkoo_profiling", default=False)
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def active() -> bool:
+    # 지금 컨텍스트가 프로파일 중이면 True (작업을 다른 스레드로 넘기지 말고 같은 스레드에서 돌려야 잡힌다)
+    return _active.get()
+
+
+def _profile_path(kind: str) -> str:
+    directory = os.path.join(config.log_path, "profiles")
+    os.makedirs(directory, exist_ok=True)
+    extension = "json" if kind == "torch" else "prof"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{uuid.uuid4().hex[:8]}_{kind}.{extension}"
+    return os.path.join(directory, name)
+
+
+@contextmanager
+def _torch_profile(path: str):
+    import torch
+    from torch.profiler import ProfilerActivity, profile
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    with profile(activities=activities, record_shapes=True) as profiler:
+        yield
+    profiler.export_chrome_trace(path)
+
+
+@contextmanager
+def _cprofile(path: str):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+@contextmanager
+def capture(kind: str):
+    # with profiling.capture("cprofile") as path: ... → 블록이 끝나면 path에 저장
+    if kind not in PROFILERS:
+        raise ValueError(f"지원하지 않는 프로파일러: {kind} (가능: {', '.join(PROFILERS)})")
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("다른 요청을 프로파일하는 중입니다.")
+    token = _active.set(True)
+    try:
+        path = _profile_path(kind)
+        recorder = _torch_profile if kind == "torch" else _cprofile
+        with recorder(path):
+            yield path
+        info(f"프로파일 저장 : {path}")
+    finally:
+        _active.reset(token)
+        _lock.release()
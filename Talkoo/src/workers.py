@@ -0,0 +1,113 @@
+import gc
+import os
+import signal
+import socket
+import time
+import torch
+import uvicorn
+import config
+import config_sync
+import model_manager
+from utils.logger import error, info
+from utils.error_codes import ErrorCode
+
+# WORKERS > 1 일 때의 멀티 프로세스 실행
+# 부모가 모델 가중치를 한번만 올리고 fork → 워커들은 copy-on-write로 같은 메모리 페이지를 읽기 전용으로 공유한다
+# 부모는 모델을 돌리지 않는다 (fork 전에 OpenMP 스레드 풀이 생기면 자식에서 멈출 수 있음)
+# 워커는 같은 리슨 소켓을 물려받아 커널이 연결을 나눠준다
+# 주의: 워커에서 모델을 교체하면 새 모델은 워커마다 따로 메모리를 쓴다 (공유는 재시작해야 돌아옴)
+
+
+def _cpu_slices(count: int) -> list[list[int]]:
+    # 사용할 수 있는 CPU를 워커 수로 나눈다
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    per_worker = max(1, len(cpus) // count)
+    return [cpus[index * per_worker:(index + 1) * per_worker] or cpus for index in range(count)]
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(index: int, sock: socket.socket, cpus: list[int], app):
+    # fork 된 자식 프로세스에서 실행
+    if config.worker_pin and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    threads = config.worker_threads if config.worker_threads > 0 else len(cpus)
+    torch.set_num_threads(threads)
+    info(f"워커 {index} 시작 (pid {os.getpid()}, 스레드 {threads}, CPU {cpus[0]}-{cpus[-1]}{'' if config.worker_pin else ' 고정 안 함'})")
+
+    model_manager.activate()
+    server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+    server.run(sockets=[sock])
+
+
+def serve(app, host: str, port: int):
+    try:
+        model_manager.preload()
+    except Exception as e:
+        error("멀티 워커 모델 로드 실패", e, ErrorCode.BASE_MODEL_LOAD_FAIL)
+        exit()
+
+    sock = _bind(host, port)
+    slices = _cpu_slices(config.workers)
+    config_sync.reset()
+    # 지금까지 만든 객체는 gc가 건드리지 않도록 고정 → 워커에서 공유 페이지가 복사되는 일을 줄인다
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                _run_worker(index, sock, slices[index], app)
+            except BaseException as e:
+                error(f"워커 {index} 오류 종료", e, ErrorCode.UNKNOWN)
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for index in range(config.workers):
+        spawn(index)
+    info(f"멀티 워커 실행 : {config.workers}개, http://{host}:{port}")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        # 죽은 워커는 부모가 가진 모델로 다시 fork
+        error(f"워커 {index} 비정상 종료 (status {status}), 다시 시작합니다.", None, ErrorCode.UNKNOWN)
+        time.sleep(1)
+        spawn(index)
+    sock.close()